@@ -21,6 +21,14 @@ from app.dependencies import get_db
 target_metadata = Base.metadata
 
 
+def include_name(name, type_, parent_names):
+    """Leave the FTS5 search table and its shadow tables to their own
+    migration, they are not part of the ORM metadata."""
+    if type_ == "table":
+        return not name.startswith("books_fts")
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -44,6 +52,7 @@ def run_migrations_offline() -> None:
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
+        include_name=include_name,
         dialect_opts={"paramstyle": "named"},
     )
 
@@ -66,7 +75,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,29 @@
+"""Add catalog sort key indexes
+
+Revision ID: 09b95f26b072
+Revises: 10e8f2588479
+Create Date: 2026-10-18 06:16:53.407047
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '09b95f26b072'
+down_revision: Union[str, None] = '10e8f2588479'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_authors_birthdate', 'authors', ['birthdate', 'id'], unique=False)
+    op.create_index('ix_books_publish_date', 'books', ['publish_date', 'id'], unique=False)
+    op.create_index('ix_publishers_established_year', 'publishers', ['established_year', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_publishers_established_year', table_name='publishers')
+    op.drop_index('ix_books_publish_date', table_name='books')
+    op.drop_index('ix_authors_birthdate', table_name='authors')
@@ -0,0 +1,62 @@
+"""Add loan due dates and overdue_loans
+
+Revision ID: 10e8f2588479
+Revises: 3b5e454fd150
+Create Date: 2026-10-18 05:22:09.428194
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from decouple import config
+
+
+# revision identifiers, used by Alembic.
+revision: str = '10e8f2588479'
+down_revision: Union[str, None] = '3b5e454fd150'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The setting borrow_book gives new loans, so backfilled and new loans agree
+LOAN_PERIOD_DAYS = config("LOAN_PERIOD_DAYS", default=14, cast=int)
+
+
+def upgrade() -> None:
+    op.create_table('overdue_loans',
+    sa.Column('loan_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=False),
+    sa.Column('days_overdue', sa.Integer(), nullable=False),
+    sa.Column('fine', sa.Integer(), nullable=False),
+    sa.Column('assessed_on', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('loan_id')
+    )
+    op.create_index('ix_overdue_loans_user_id', 'overdue_loans', ['user_id'], unique=False)
+    op.add_column('borrowing_history', sa.Column('due_date', sa.Date(), nullable=True))
+
+    # Backfill: active loans are due LOAN_PERIOD_DAYS after they were borrowed
+    if op.get_bind().dialect.name == 'sqlite':
+        due_date = f"date(borrow_date, '+{LOAN_PERIOD_DAYS} days')"
+    else:
+        due_date = f"borrow_date + {LOAN_PERIOD_DAYS}"
+    op.execute(
+        f"UPDATE borrowing_history SET due_date = {due_date} "
+        "WHERE return_date IS NULL"
+    )
+
+    op.create_index('ix_borrowing_history_active_due_date', 'borrowing_history', ['due_date', 'id'], unique=False, sqlite_where=sa.text('return_date IS NULL'), postgresql_where=sa.text('return_date IS NULL'))
+    op.add_column('borrowing_history_archive', sa.Column('due_date', sa.Date(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('borrowing_history_archive') as batch_op:
+        batch_op.drop_column('due_date')
+    op.drop_index('ix_borrowing_history_active_due_date', table_name='borrowing_history', sqlite_where=sa.text('return_date IS NULL'), postgresql_where=sa.text('return_date IS NULL'))
+    with op.batch_alter_table('borrowing_history') as batch_op:
+        batch_op.drop_column('due_date')
+    op.drop_index('ix_overdue_loans_user_id', table_name='overdue_loans')
+    op.drop_table('overdue_loans')
@@ -0,0 +1,49 @@
+"""Add users active loan summary
+
+Revision ID: 3b5e454fd150
+Revises: efa8f9f8854c
+Create Date: 2026-10-18 05:19:35.388765
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b5e454fd150'
+down_revision: Union[str, None] = 'efa8f9f8854c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('active_loans', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('oldest_loan_date', sa.Date(), nullable=True))
+
+    # Backfill the summary from the active loans
+    op.execute(
+        "UPDATE users SET "
+        "active_loans = (SELECT count(*) FROM borrowing_history "
+        "WHERE borrowing_history.user_id = users.id "
+        "AND borrowing_history.return_date IS NULL), "
+        "oldest_loan_date = (SELECT min(borrow_date) FROM borrowing_history "
+        "WHERE borrowing_history.user_id = users.id "
+        "AND borrowing_history.return_date IS NULL)"
+    )
+
+    op.create_index('ix_users_active_loans', 'users', ['active_loans', 'id'], unique=False)
+    op.create_index('ix_users_debtors_email', 'users', ['email', 'id'], unique=False, sqlite_where=sa.text('active_loans > 0'), postgresql_where=sa.text('active_loans > 0'))
+    op.create_index('ix_users_debtors_id', 'users', ['id'], unique=False, sqlite_where=sa.text('active_loans > 0'), postgresql_where=sa.text('active_loans > 0'))
+    op.create_index('ix_users_oldest_loan_date', 'users', ['oldest_loan_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_oldest_loan_date', table_name='users')
+    op.drop_index('ix_users_debtors_id', table_name='users', sqlite_where=sa.text('active_loans > 0'), postgresql_where=sa.text('active_loans > 0'))
+    op.drop_index('ix_users_debtors_email', table_name='users', sqlite_where=sa.text('active_loans > 0'), postgresql_where=sa.text('active_loans > 0'))
+    op.drop_index('ix_users_active_loans', table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('oldest_loan_date')
+        batch_op.drop_column('active_loans')
@@ -0,0 +1,46 @@
+"""Add borrowing and book indexes
+
+Revision ID: 3f6c2a9d41e7
+Revises: 8b82f62f7b71
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6c2a9d41e7'
+down_revision: Union[str, None] = '8b82f62f7b71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Dialects that support partial ("active loan") indexes
+PARTIAL_INDEX_DIALECTS = ('sqlite', 'postgresql')
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_books_author_id'), 'books', ['author_id'], unique=False)
+    op.create_index(op.f('ix_books_genre_id'), 'books', ['genre_id'], unique=False)
+    op.create_index(op.f('ix_books_publisher_id'), 'books', ['publisher_id'], unique=False)
+    op.create_index('ix_borrowing_history_book_id_return_date', 'borrowing_history', ['book_id', 'return_date'], unique=False)
+    op.create_index('ix_borrowing_history_user_id_return_date', 'borrowing_history', ['user_id', 'return_date'], unique=False)
+
+    if op.get_bind().dialect.name in PARTIAL_INDEX_DIALECTS:
+        active = sa.text('return_date IS NULL')
+        op.create_index('ix_borrowing_history_active_book_id', 'borrowing_history', ['book_id'], unique=False, sqlite_where=active, postgresql_where=active)
+        op.create_index('ix_borrowing_history_active_user_id', 'borrowing_history', ['user_id'], unique=False, sqlite_where=active, postgresql_where=active)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name in PARTIAL_INDEX_DIALECTS:
+        op.drop_index('ix_borrowing_history_active_user_id', table_name='borrowing_history')
+        op.drop_index('ix_borrowing_history_active_book_id', table_name='borrowing_history')
+
+    op.drop_index('ix_borrowing_history_user_id_return_date', table_name='borrowing_history')
+    op.drop_index('ix_borrowing_history_book_id_return_date', table_name='borrowing_history')
+    op.drop_index(op.f('ix_books_publisher_id'), table_name='books')
+    op.drop_index(op.f('ix_books_genre_id'), table_name='books')
+    op.drop_index(op.f('ix_books_author_id'), table_name='books')
@@ -0,0 +1,38 @@
+"""Add catalog_versions
+
+Revision ID: 5e1b7c3d8f20
+Revises: a7d04e5b9c12
+Create Date: 2026-10-18 11:42:06.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1b7c3d8f20'
+down_revision: Union[str, None] = 'a7d04e5b9c12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    catalog_versions = op.create_table('catalog_versions',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(
+        catalog_versions,
+        [
+            {'name': name, 'version': 0}
+            for name in ('books', 'authors', 'genres', 'publishers')
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('catalog_versions')
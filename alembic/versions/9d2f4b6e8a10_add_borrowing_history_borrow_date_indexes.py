@@ -0,0 +1,27 @@
+"""Add borrowing_history borrow_date indexes
+
+Revision ID: 9d2f4b6e8a10
+Revises: c4e8a1f05b63
+Create Date: 2026-10-18 15:02:51.873420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2f4b6e8a10'
+down_revision: Union[str, None] = 'c4e8a1f05b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_borrowing_history_book_id_borrow_date', 'borrowing_history', ['book_id', 'borrow_date', 'id'], unique=False)
+    op.create_index('ix_borrowing_history_user_id_borrow_date', 'borrowing_history', ['user_id', 'borrow_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_borrowing_history_user_id_borrow_date', table_name='borrowing_history')
+    op.drop_index('ix_borrowing_history_book_id_borrow_date', table_name='borrowing_history')
@@ -0,0 +1,35 @@
+"""Add books.available_copies
+
+Revision ID: a7d04e5b9c12
+Revises: 3f6c2a9d41e7
+Create Date: 2026-10-18 10:03:17.442981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d04e5b9c12'
+down_revision: Union[str, None] = '3f6c2a9d41e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('books', sa.Column('available_copies', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill: every copy that is not on an active loan is available
+    op.execute(
+        "UPDATE books SET available_copies = number_of_copies - ("
+        "SELECT count(*) FROM borrowing_history "
+        "WHERE borrowing_history.book_id = books.id "
+        "AND borrowing_history.return_date IS NULL)"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('books') as batch_op:
+        batch_op.drop_column('available_copies')
@@ -0,0 +1,71 @@
+"""Add books full-text search
+
+Revision ID: c4e8a1f05b63
+Revises: 5e1b7c3d8f20
+Create Date: 2026-10-18 13:15:42.307716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1f05b63'
+down_revision: Union[str, None] = '5e1b7c3d8f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # FTS5 is SQLite only, other databases fall back to substring search
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE books_fts USING fts5("
+        "title, author, tokenize = 'unicode61 remove_diacritics 2', "
+        "prefix = '2 3 4')"
+    )
+    op.execute(
+        "INSERT INTO books_fts(books_fts, rank) "
+        "VALUES ('rank', 'bm25(10.0, 1.0)')"
+    )
+    op.execute(
+        "INSERT INTO books_fts(rowid, title, author) "
+        "SELECT books.id, books.title, authors.name FROM books "
+        "JOIN authors ON authors.id = books.author_id"
+    )
+    op.execute(
+        "CREATE TRIGGER books_fts_insert AFTER INSERT ON books "
+        "BEGIN INSERT INTO books_fts(rowid, title, author) VALUES (new.id, "
+        "new.title, (SELECT name FROM authors WHERE id = new.author_id)); END"
+    )
+    op.execute(
+        "CREATE TRIGGER books_fts_update "
+        "AFTER UPDATE OF title, author_id ON books "
+        "BEGIN UPDATE books_fts SET title = new.title, author = ("
+        "SELECT name FROM authors WHERE id = new.author_id) "
+        "WHERE rowid = old.id; END"
+    )
+    op.execute(
+        "CREATE TRIGGER books_fts_delete AFTER DELETE ON books "
+        "BEGIN DELETE FROM books_fts WHERE rowid = old.id; END"
+    )
+    op.execute(
+        "CREATE TRIGGER books_fts_author_update "
+        "AFTER UPDATE OF name ON authors "
+        "BEGIN UPDATE books_fts SET author = new.name WHERE rowid IN ("
+        "SELECT id FROM books WHERE author_id = new.id); END"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER books_fts_author_update")
+    op.execute("DROP TRIGGER books_fts_delete")
+    op.execute("DROP TRIGGER books_fts_update")
+    op.execute("DROP TRIGGER books_fts_insert")
+    op.execute("DROP TABLE books_fts")
@@ -0,0 +1,39 @@
+"""Add borrowing_history_archive
+
+Revision ID: efa8f9f8854c
+Revises: 9d2f4b6e8a10
+Create Date: 2026-10-18 05:17:30.414391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'efa8f9f8854c'
+down_revision: Union[str, None] = '9d2f4b6e8a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('borrowing_history_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('borrow_date', sa.Date(), nullable=False),
+    sa.Column('return_date', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_borrowing_history_archive_book_id_borrow_date', 'borrowing_history_archive', ['book_id', 'borrow_date', 'id'], unique=False)
+    op.create_index('ix_borrowing_history_archive_user_id_borrow_date', 'borrowing_history_archive', ['user_id', 'borrow_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_borrowing_history_archive_user_id_borrow_date', table_name='borrowing_history_archive')
+    op.drop_index('ix_borrowing_history_archive_book_id_borrow_date', table_name='borrowing_history_archive')
+    op.drop_table('borrowing_history_archive')
@@ -0,0 +1,105 @@
+from functools import wraps
+from typing import Any, Callable, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import crud
+from db import models
+
+# ------------------------------------
+# Async adapters for the CRUD operations
+# ------------------------------------
+#
+# Each function below mirrors its namesake in app.crud. With an AsyncSession
+# the sync implementation runs through AsyncSession.run_sync, so every SQL
+# round trip is awaited on the event loop instead of blocking it. With a
+# plain Session the sync implementation runs on the threadpool, as the
+# plain def handlers did.
+
+# Relationships read by the response models, loaded before leaving run_sync
+# or the threadpool: lazy loads are not possible on the event loop with an
+# AsyncSession, and would block it with a Session.
+RESPONSE_RELATIONSHIPS = {
+    models.Book: ("author", "genre"),
+    models.BorrowingHistory: ("user",),
+}
+
+
+def _load_response_relationships(result: Any) -> Any:
+    """Touch the relationships the response models will serialize."""
+    items = result if isinstance(result, list) else [result]
+    for item in items:
+        for attribute in RESPONSE_RELATIONSHIPS.get(type(item), ()):
+            getattr(item, attribute)
+    return result
+
+
+async def run(
+    db: Union[Session, AsyncSession], func: Callable, *args, **kwargs
+) -> Any:
+    """Run a sync CRUD function against either kind of session, without
+    blocking the event loop."""
+
+    def call(session: Session) -> Any:
+        return _load_response_relationships(func(session, *args, **kwargs))
+
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(call)
+    return await run_in_threadpool(call, db)
+
+
+def _async_variant(func: Callable) -> Callable:
+    """Build the awaitable counterpart of a sync CRUD function."""
+
+    @wraps(func)
+    async def wrapper(db: Union[Session, AsyncSession], *args, **kwargs):
+        return await run(db, func, *args, **kwargs)
+
+    return wrapper
+
+
+# Catalog versions
+get_catalog_versions = _async_variant(crud.get_catalog_versions)
+
+# Books
+create_book = _async_variant(crud.create_book)
+import_books_chunk = _async_variant(crud.import_books_chunk)
+get_book = _async_variant(crud.get_book)
+get_book_rows = _async_variant(crud.get_book_rows)
+search_books = _async_variant(crud.search_books)
+
+# Authors
+create_author = _async_variant(crud.create_author)
+get_author = _async_variant(crud.get_author)
+get_author_rows = _async_variant(crud.get_author_rows)
+get_author_book_rows = _async_variant(crud.get_author_book_rows)
+
+# Genres
+create_genre = _async_variant(crud.create_genre)
+get_genre = _async_variant(crud.get_genre)
+get_genre_rows = _async_variant(crud.get_genre_rows)
+get_genre_book_rows = _async_variant(crud.get_genre_book_rows)
+
+# Publishers
+create_publisher = _async_variant(crud.create_publisher)
+get_publisher = _async_variant(crud.get_publisher)
+get_publisher_rows = _async_variant(crud.get_publisher_rows)
+
+# Users
+create_user = _async_variant(crud.create_user)
+get_user_by_email = _async_variant(crud.get_user_by_email)
+get_user_rows = _async_variant(crud.get_user_rows)
+get_debtor_rows = _async_variant(crud.get_debtor_rows)
+
+# Borrowing
+get_available_books_count = _async_variant(crud.get_available_books_count)
+borrow_book = _async_variant(crud.borrow_book)
+return_book = _async_variant(crud.return_book)
+get_overdue_loans = _async_variant(crud.get_overdue_loans)
+
+# Borrowing history
+get_borrowing_history = _async_variant(crud.get_borrowing_history)
+get_user_borrowing_history = _async_variant(crud.get_user_borrowing_history)
+get_active_borrowing_book = _async_variant(crud.get_active_borrowing_book)
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable, Union
+
+from decouple import config
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from app import crud
+from app.negotiation import MSGPACK
+from app.responses import packb
+
+# Rows fetched from the database cursor, and written to the response, at a
+# time. The export never holds more than one batch in memory.
+EXPORT_BATCH_SIZE = config("EXPORT_BATCH_SIZE", default=1000, cast=int)
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "msgpack": MSGPACK,
+}
+
+COLUMNS = (
+    "id",
+    "title",
+    "isbn",
+    "publish_date",
+    "number_of_copies",
+    "publisher_id",
+    "author_id",
+    "author_name",
+    "genre_id",
+    "genre_name",
+)
+
+
+async def _batches(
+    db: Union[Session, AsyncSession], batch_size: int
+) -> AsyncIterator[list[Row]]:
+    """Stream the export rows in batches over a connection of their own.
+
+    The request's session is closed once the endpoint returns, before the
+    body is sent, so the rows are read on a connection held by this
+    generator for as long as the response streams."""
+    statement = crud.get_books_export_statement().execution_options(
+        yield_per=batch_size
+    )
+    if isinstance(db, AsyncSession):
+        async with db.bind.connect() as connection:
+            result = await connection.stream(statement)
+            async for batch in result.partitions():
+                yield batch
+        return
+
+    # Like the sync CRUD paths, the blocking reads run on the threadpool
+    connection = await run_in_threadpool(db.get_bind().connect)
+    try:
+        result = await run_in_threadpool(connection.execute, statement)
+        async for batch in iterate_in_threadpool(result.partitions()):
+            yield batch
+    finally:
+        await run_in_threadpool(connection.close)
+
+
+def format_ndjson(rows: Iterable[Row]) -> bytes:
+    lines = (
+        json.dumps(row._asdict(), default=str, separators=(",", ":"))
+        for row in rows
+    )
+    return "".join(line + "\n" for line in lines).encode()
+
+
+def format_msgpack(rows: Iterable[Row]) -> bytes:
+    return b"".join(packb(row._asdict()) for row in rows)
+
+
+def format_csv(rows: Iterable[Row], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(COLUMNS)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def export_books(
+    db: Union[Session, AsyncSession],
+    format: str,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """Yield the whole catalog as NDJSON, CSV or a stream of msgpack maps,
+    one chunk per batch."""
+    if format == "csv":
+        yield format_csv((), header=True)
+    async for batch in _batches(db, batch_size):
+        if format == "csv":
+            yield format_csv(batch)
+        elif format == "msgpack":
+            yield format_msgpack(batch)
+        else:
+            yield format_ndjson(batch)
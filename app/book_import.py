@@ -0,0 +1,135 @@
+import csv
+import io
+import json
+from itertools import islice
+from operator import attrgetter
+from typing import BinaryIO, Iterator
+
+import msgpack
+from decouple import config
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import async_crud, crud, schemas
+
+# Rows are validated and inserted IMPORT_CHUNK_SIZE at a time, and the
+# report keeps the first IMPORT_MAX_ERRORS errors, so memory use does not
+# grow with the size of the input.
+IMPORT_CHUNK_SIZE = config("IMPORT_CHUNK_SIZE", default=1000, cast=int)
+IMPORT_MAX_ERRORS = config("IMPORT_MAX_ERRORS", default=1000, cast=int)
+
+FORMATS = ("csv", "ndjson", "msgpack")
+
+Chunk = tuple[list[tuple[int, dict]], list[schemas.BookImportError]]
+
+
+def guess_format(filename: str) -> str:
+    """The input format implied by a file name: ndjson for .ndjson/.jsonl,
+    msgpack for .msgpack/.mpk, csv otherwise."""
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if filename and filename.lower().endswith((".msgpack", ".mpk")):
+        return "msgpack"
+    return "csv"
+
+
+def read_records(stream: BinaryIO, format: str) -> Iterator[tuple]:
+    """Yield (row number, values, error) for each record of the input.
+
+    Row numbers count records from 1, excluding the CSV header. A msgpack
+    input is a stream of maps, unreadable past the first invalid record."""
+    if format == "msgpack":
+        row = 0
+        try:
+            for row, values in enumerate(msgpack.Unpacker(stream), start=1):
+                if isinstance(values, dict):
+                    yield row, values, None
+                else:
+                    yield row, None, "Expected a MessagePack map"
+        except ValueError:
+            yield row + 1, None, "Invalid MessagePack"
+        return
+
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if format == "csv":
+        for row, values in enumerate(csv.DictReader(text), start=1):
+            yield row, values, None
+        return
+
+    for row, line in enumerate(filter(str.strip, text), start=1):
+        try:
+            values = json.loads(line)
+        except ValueError:
+            yield row, None, "Invalid JSON"
+            continue
+        if isinstance(values, dict):
+            yield row, values, None
+        else:
+            yield row, None, "Expected a JSON object"
+
+
+def read_chunk(records: Iterator[tuple], size: int) -> Chunk:
+    """Take the next chunk of records, separating unparseable ones."""
+    rows = []
+    errors = []
+    for row, values, error in islice(records, size):
+        if error is None:
+            rows.append((row, values))
+        else:
+            errors.append(schemas.BookImportError(row=row, detail=error))
+    return rows, errors
+
+
+class ImportReport:
+    """Totals of an import, keeping at most max_errors row errors."""
+
+    def __init__(self, max_errors: int = IMPORT_MAX_ERRORS):
+        self.max_errors = max_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors: list[schemas.BookImportError] = []
+
+    def add(
+        self, imported: int, errors: list[schemas.BookImportError]
+    ) -> None:
+        self.imported += imported
+        self.failed += len(errors)
+        self.errors.extend(errors[: self.max_errors - len(self.errors)])
+
+    def result(self) -> schemas.BookImportReport:
+        return schemas.BookImportReport(
+            imported=self.imported, failed=self.failed, errors=self.errors
+        )
+
+
+def import_books(
+    db: Session,
+    stream: BinaryIO,
+    format: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> schemas.BookImportReport:
+    """Import books from a CSV, NDJSON or msgpack stream, one chunk at a
+    time."""
+    records = read_records(stream, format)
+    report = ImportReport()
+    while True:
+        rows, errors = read_chunk(records, chunk_size)
+        if not rows and not errors:
+            return report.result()
+        imported, rejected = crud.import_books_chunk(db, rows)
+        report.add(imported, sorted(errors + rejected, key=attrgetter("row")))
+
+
+async def import_books_async(
+    db, stream: BinaryIO, format: str, chunk_size: int = IMPORT_CHUNK_SIZE
+) -> schemas.BookImportReport:
+    """import_books for request handlers: the input is parsed on the
+    threadpool and every chunk is written through async_crud."""
+    records = read_records(stream, format)
+    report = ImportReport()
+    while True:
+        rows, errors = await run_in_threadpool(read_chunk, records, chunk_size)
+        if not rows and not errors:
+            return report.result()
+        imported, rejected = await async_crud.import_books_chunk(db, rows)
+        report.add(imported, sorted(errors + rejected, key=attrgetter("row")))
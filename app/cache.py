@@ -0,0 +1,104 @@
+import sys
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """A thread-safe LRU cache whose entries also expire after ttl seconds.
+
+    With maxbytes, the entries are also bounded by their total size as
+    measured by sizeof. Keeps hit, miss and eviction counters for the
+    diagnostics endpoint."""
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        maxbytes: int = 0,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self._entries: OrderedDict[Hashable, tuple[float, Any, int]] = (
+            OrderedDict()
+        )
+        self._lock = Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value, size = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.bytes -= size
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, ttl: float = None) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        size = self.sizeof(value) if self.maxbytes else 0
+        with self._lock:
+            self._pop(key)
+            if self.maxbytes and size > self.maxbytes:
+                return
+            self._entries[key] = (time.monotonic() + ttl, value, size)
+            self.bytes += size
+            while len(self._entries) > self.maxsize or (
+                self.maxbytes and self.bytes > self.maxbytes
+            ):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def _pop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry."""
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Size and hit/miss counters of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "bytes": self.bytes,
+                "maxbytes": self.maxbytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,159 @@
+"""Maintenance commands for the library database.
+
+Usage: python -m app.cli <command> [options]
+"""
+
+import argparse
+import sys
+from datetime import date, timedelta
+
+from app import crud
+from app.book_import import (
+    FORMATS,
+    IMPORT_CHUNK_SIZE,
+    guess_format,
+    import_books,
+)
+from db.engine import SessionLocal
+
+
+def check_copies(args: argparse.Namespace) -> int:
+    """Report, and optionally repair, drifted available_copies counters."""
+    db = SessionLocal()
+    try:
+        inconsistent = crud.get_inconsistent_available_copies(db)
+        for book_id, stored, expected in inconsistent:
+            print(
+                f"Book {book_id}: available_copies is {stored}, "
+                f"expected {expected}"
+            )
+        if not inconsistent:
+            print("All available_copies counters are consistent.")
+            return 0
+        if args.repair:
+            repaired = crud.repair_available_copies(db)
+            print(f"Repaired {repaired} book(s).")
+            return 0
+        return 1
+    finally:
+        db.close()
+
+
+def import_books_command(args: argparse.Namespace) -> int:
+    """Import books from a CSV or NDJSON file and report the failed rows."""
+    db = SessionLocal()
+    try:
+        with open(args.file, "rb") as stream:
+            report = import_books(
+                db,
+                stream,
+                args.format or guess_format(args.file),
+                chunk_size=args.chunk_size,
+            )
+    finally:
+        db.close()
+
+    for error in report.errors:
+        print(f"Row {error.row}: {error.detail}")
+    if report.failed > len(report.errors):
+        print(f"... {report.failed - len(report.errors)} more error(s)")
+    print(f"Imported {report.imported} book(s), {report.failed} failed.")
+    return 1 if report.failed else 0
+
+
+def archive_loans(args: argparse.Namespace) -> int:
+    """Move loans returned more than the given days ago to the archive."""
+    returned_before = date.today() - timedelta(days=args.older_than_days)
+    db = SessionLocal()
+    try:
+        archived = crud.archive_returned_loans(
+            db, returned_before, batch_size=args.batch_size
+        )
+    finally:
+        db.close()
+
+    print(f"Archived {archived} loan(s) returned before {returned_before}.")
+    return 0
+
+
+def sweep_overdue(args: argparse.Namespace) -> int:
+    """Record the loans past their due date and their fines."""
+    db = SessionLocal()
+    try:
+        swept = crud.sweep_overdue_loans(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    print(f"{swept} loan(s) overdue.")
+    return 0
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    check = commands.add_parser(
+        "check-copies",
+        help="Compare available_copies with the active loans of each book.",
+    )
+    check.add_argument(
+        "--repair",
+        action="store_true",
+        help="Recompute the counters that are out of step.",
+    )
+    check.set_defaults(handler=check_copies)
+
+    import_parser = commands.add_parser(
+        "import-books",
+        help="Import books from a CSV or NDJSON file, in chunks.",
+    )
+    import_parser.add_argument("file", help="Path of the file to import.")
+    import_parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        help="Input format, by default guessed from the file extension.",
+    )
+    import_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=IMPORT_CHUNK_SIZE,
+        help="Rows validated and inserted per transaction.",
+    )
+    import_parser.set_defaults(handler=import_books_command)
+
+    archive = commands.add_parser(
+        "archive-loans",
+        help="Move old returned loans to the borrowing history archive.",
+    )
+    archive.add_argument(
+        "--older-than-days",
+        type=int,
+        default=crud.ARCHIVE_AFTER_DAYS,
+        help="Archive loans returned more than this many days ago.",
+    )
+    archive.add_argument(
+        "--batch-size",
+        type=int,
+        default=crud.ARCHIVE_BATCH_SIZE,
+        help="Loans moved per transaction.",
+    )
+    archive.set_defaults(handler=archive_loans)
+
+    sweep = commands.add_parser(
+        "sweep-overdue",
+        help="Record the active loans past their due date and their fines.",
+    )
+    sweep.add_argument(
+        "--batch-size",
+        type=int,
+        default=crud.OVERDUE_SWEEP_BATCH_SIZE,
+        help="Loans recorded per transaction.",
+    )
+    sweep.set_defaults(handler=sweep_overdue)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,194 @@
-from datetime import date
+import re
+from datetime import date, datetime, timedelta
 from typing import Optional
 
+from decouple import config
 from fastapi import HTTPException
-from sqlalchemy import asc, desc
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy import (
+    Date,
+    Integer,
+    case,
+    cast,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.orm import Session, aliased, joinedload, selectinload
+from sqlalchemy.sql import Select
 
 from db import models
 from app import schemas
+from app.pagination import Page, SortKeys, paginate
+from app.result_cache import mark_stale, result_cache
 from app.security import hash_password
 
+# ------------------------------------
+# Relationship loading
+# ------------------------------------
+
+LOADER_STRATEGIES = {"selectin": selectinload, "joined": joinedload}
+
+# Search results load their authors and genres with one extra query per
+# relationship, a single book joins them into the same statement. Catalog
+# lists select their columns directly, see _book_row_page.
+LIST_LOADER_STRATEGY = config("LIST_LOADER_STRATEGY", default="selectin")
+DETAIL_LOADER_STRATEGY = config("DETAIL_LOADER_STRATEGY", default="joined")
+
+
+def book_loader_options(strategy: str) -> list:
+    """Loader options for the relationships serialized by schemas.Book."""
+    loader = LOADER_STRATEGIES[strategy]
+    return [loader(models.Book.author), loader(models.Book.genre)]
+
+
+# ------------------------------------
+# Column projections
+# ------------------------------------
+#
+# The *_rows variants of the list functions select only the columns of
+# their response schema and return plain dicts, skipping ORM instances and
+# their identity-map bookkeeping. Routers serialize them with
+# app.responses.ListSerializer.
+
+
+def _column_page(
+    db: Session,
+    model,
+    schema: type,
+    sort_keys: SortKeys,
+    *criteria,
+    **paging,
+) -> Page:
+    """A page of the columns of a flat schema, as dicts."""
+    columns = [getattr(model, field) for field in schema.model_fields]
+    query = db.query(*columns).filter(*criteria)
+    page = paginate(query, model.id, sort_keys, **paging)
+    return Page([row._asdict() for row in page], page.next_cursor)
+
+
+# ------------------------------------
+# Catalog versions
+# ------------------------------------
+
+
+def bump_catalog_version(db: Session, *tables: str) -> None:
+    """Record a change to catalog tables within the caller's transaction."""
+    now = datetime.utcnow()
+    version = models.CatalogVersion.version
+    for table in tables:
+        bumped = (
+            db.query(models.CatalogVersion)
+            .filter(models.CatalogVersion.name == table)
+            .update(
+                {version: version + 1, models.CatalogVersion.updated_at: now},
+                synchronize_session=False,
+            )
+        )
+        if not bumped:
+            db.add(
+                models.CatalogVersion(name=table, version=1, updated_at=now)
+            )
+
+
+def get_catalog_versions(
+    db: Session, tables: tuple[str, ...]
+) -> dict[str, tuple[int, Optional[datetime]]]:
+    """Returns the (version, updated_at) of each of the given tables."""
+    rows = db.query(
+        models.CatalogVersion.name,
+        models.CatalogVersion.version,
+        models.CatalogVersion.updated_at,
+    ).filter(models.CatalogVersion.name.in_(tables))
+    versions = {name: (0, None) for name in tables}
+    versions.update({name: (version, at) for name, version, at in rows})
+    return versions
+
 
 # ------------------------------------
 # CRUD operations for Books
 # ------------------------------------
 
 
+# Sort options shared by every list of books
+BOOK_SORT_KEYS = {
+    "title": (models.Book.title, "title"),
+    "publish_date": (models.Book.publish_date, "publish_date"),
+    "author": (models.Author.name, "author.name"),
+}
+
+
+# A book with its author and genre as one flat row, see _book_row
+BOOK_ROW_COLUMNS = (
+    models.Book.id,
+    models.Book.title,
+    models.Book.isbn,
+    models.Book.publish_date,
+    models.Book.publisher_id,
+    models.Author.id.label("author_id"),
+    models.Author.name.label("author_name"),
+    models.Author.birthdate.label("author_birthdate"),
+    models.Genre.id.label("genre_id"),
+    models.Genre.name.label("genre_name"),
+)
+BOOK_ROW_SORT_KEYS = {
+    **BOOK_SORT_KEYS,
+    "author": (models.Author.name, "author_name"),
+}
+
+
+def _book_row(row) -> dict:
+    """Nest the author and genre columns of a row as in schemas.Book."""
+    return {
+        "id": row.id,
+        "title": row.title,
+        "isbn": row.isbn,
+        "publish_date": row.publish_date,
+        "publisher_id": row.publisher_id,
+        "author": {
+            "id": row.author_id,
+            "name": row.author_name,
+            "birthdate": row.author_birthdate,
+        },
+        "genre": {"id": row.genre_id, "name": row.genre_name},
+    }
+
+
+def _book_row_page(db: Session, *criteria, **paging) -> Page:
+    """A page of books as schemas.Book-shaped dicts, in one query."""
+    query = (
+        db.query(*BOOK_ROW_COLUMNS)
+        .join(models.Author, models.Author.id == models.Book.author_id)
+        .join(models.Genre, models.Genre.id == models.Book.genre_id)
+        .filter(*criteria)
+    )
+    page = paginate(query, models.Book.id, BOOK_ROW_SORT_KEYS, **paging)
+    return Page([_book_row(row) for row in page], page.next_cursor)
+
+
+def _book_value_error(book: schemas.BookCreate) -> Optional[str]:
+    """Check the values of a new book that the schema does not."""
+    # Ensure the number of copies is a positive integer
+    if (
+        book.number_of_copies is None
+        or not isinstance(book.number_of_copies, int)
+        or book.number_of_copies < 0
+    ):
+        return "Number of copies must be a positive integer"
+
+    # Ensure the publication year is a valid year
+    if not date(1500, 1, 1) <= book.publish_date <= date.today():
+        return "Publication year must be realistic"
+    return None
+
+
 def create_book(db: Session, book: schemas.BookCreate) -> models.Book:
     """Create a new book with appropriate validations and return it."""
     # Ensure the author exists
@@ -42,68 +216,213 @@ def create_book(db: Session, book: schemas.BookCreate) -> models.Book:
     if not publisher:
         raise HTTPException(status_code=404, detail="Publisher not found")
 
-    # Ensure the number of copies is a positive integer
-    if (
-        book.number_of_copies is None
-        or not isinstance(book.number_of_copies, int)
-        or book.number_of_copies < 0
-    ):
-        raise HTTPException(
-            status_code=400,
-            detail="Number of copies must be a positive integer",
-        )
-
-    # Ensure the publication year is a valid year
-    if not date(1500, 1, 1) <= book.publish_date <= date.today():
-        raise HTTPException(
-            status_code=400, detail="Publication year must be realistic"
-        )
+    detail = _book_value_error(book)
+    if detail is not None:
+        raise HTTPException(status_code=400, detail=detail)
 
     # Create and save the book in the database
     db_book = models.Book(**book.dict())
     db.add(db_book)
+    bump_catalog_version(db, "books")
     db.commit()
     db.refresh(db_book)
     return db_book
 
 
-def get_book(db: Session, book_id: int) -> models.Book:
+def import_books_chunk(
+    db: Session, rows: list[tuple[int, dict]]
+) -> tuple[int, list[schemas.BookImportError]]:
+    """Validate and insert a chunk of (row number, values) pairs at once.
+
+    Applies the checks of create_book, but looks up the referenced authors,
+    genres and publishers of the whole chunk with a single query and
+    inserts the valid rows with one executemany. Returns the number of
+    imported books and the errors of the rejected rows."""
+    errors = []
+    books = []
+    for row, values in rows:
+        try:
+            # Empty CSV cells fall back to the schema defaults
+            book = schemas.BookCreate.model_validate(
+                {key: value for key, value in values.items() if value != ""}
+            )
+        except ValidationError as exc:
+            detail = "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in exc.errors()
+            )
+            errors.append(schemas.BookImportError(row=row, detail=detail))
+            continue
+        detail = _book_value_error(book)
+        if detail is not None:
+            errors.append(schemas.BookImportError(row=row, detail=detail))
+            continue
+        books.append((row, book))
+
+    references = {
+        "author_id": models.Author,
+        "genre_id": models.Genre,
+        "publisher_id": models.Publisher,
+    }
+    existing = {field: set() for field in references}
+    if books:
+        lookup = union_all(
+            *(
+                select(literal(field), model.id).where(
+                    model.id.in_({getattr(book, field) for _, book in books})
+                )
+                for field, model in references.items()
+            )
+        )
+        for field, id_ in db.execute(lookup):
+            existing[field].add(id_)
+
+    values = []
+    for row, book in books:
+        missing = [
+            f"{model.__name__} not found"
+            for field, model in references.items()
+            if getattr(book, field) not in existing[field]
+        ]
+        if missing:
+            errors.append(
+                schemas.BookImportError(row=row, detail="; ".join(missing))
+            )
+            continue
+        values.append(
+            {**book.model_dump(), "available_copies": book.number_of_copies}
+        )
+
+    if values:
+        # A Core insert, the ORM's per-row bookkeeping is not needed here
+        db.execute(insert(models.Book.__table__), values)
+        bump_catalog_version(db, "books")
+        # Core inserts bypass the ORM events the result cache relies on
+        mark_stale(
+            db,
+            "books",
+            *{f"author:{value['author_id']}" for value in values},
+            *{f"genre:{value['genre_id']}" for value in values},
+        )
+        db.commit()
+    return len(values), errors
+
+
+def get_book(
+    db: Session, book_id: int, loader: str = DETAIL_LOADER_STRATEGY
+) -> models.Book:
     """Retrieve a book by its ID."""
-    return db.query(models.Book).filter(models.Book.id == book_id).first()
+    return (
+        db.query(models.Book)
+        .options(*book_loader_options(loader))
+        .filter(models.Book.id == book_id)
+        .first()
+    )
 
 
-def get_books(
+@result_cache.cached(schemas.Book, tags=("catalog", "books"))
+def get_book_rows(
     db: Session,
     offset: int = 0,
     limit: int = 10,
     sort_by: Optional[str] = None,
     sort_order: str = "asc",
+    cursor: Optional[str] = None,
+) -> Page:
+    """Retrieve a page of books with optional sorting, as dicts of the
+    columns of schemas.Book."""
+    return _book_row_page(
+        db,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+    )
+
+
+def get_books_export_statement() -> Select:
+    """Every book with its author and genre names, one flat row each.
+
+    Meant to be streamed, see app.book_export."""
+    return (
+        select(
+            models.Book.id,
+            models.Book.title,
+            models.Book.isbn,
+            models.Book.publish_date,
+            models.Book.number_of_copies,
+            models.Book.publisher_id,
+            models.Book.author_id,
+            models.Author.name.label("author_name"),
+            models.Book.genre_id,
+            models.Genre.name.label("genre_name"),
+        )
+        .join(models.Author, models.Author.id == models.Book.author_id)
+        .join(models.Genre, models.Genre.id == models.Book.genre_id)
+        .order_by(models.Book.id)
+    )
+
+
+# Every match of a query is ranked by default. A SEARCH_RANK_WINDOW limits
+# the search to its newest matches on every page, which bounds the cost of
+# broad queries: matches outside the window are never returned.
+SEARCH_RANK_WINDOW = config("SEARCH_RANK_WINDOW", default=0, cast=int)
+
+
+@result_cache.cached(schemas.Book, tags=("catalog", "books"))
+def search_books(
+    db: Session,
+    q: str,
+    offset: int = 0,
+    limit: int = 10,
+    loader: str = LIST_LOADER_STRATEGY,
 ) -> list[models.Book]:
-    """Retrieve a list of books with optional sorting."""
-    query = db.query(models.Book)
-
-    # Add sorting logic
-    if sort_by:
-        if sort_by == "title":
-            query = query.order_by(
-                asc(models.Book.title)
-                if sort_order == "asc"
-                else desc(models.Book.title)
-            )
-        elif sort_by == "publish_date":
-            query = query.order_by(
-                asc(models.Book.publish_date)
-                if sort_order == "asc"
-                else desc(models.Book.publish_date)
+    """Search books by title and author name, best matches first.
+
+    Every word of q has to match, as a word prefix on SQLite's full-text
+    index and as a substring elsewhere."""
+    words = re.findall(r"\w+", q)
+    if not words:
+        return []
+
+    query = db.query(models.Book).options(*book_loader_options(loader))
+    if db.get_bind().dialect.name != "sqlite":
+        query = query.join(models.Book.author)
+        for word in words:
+            query = query.filter(
+                or_(
+                    models.Book.title.icontains(word, autoescape=True),
+                    models.Author.name.icontains(word, autoescape=True),
+                )
             )
-        elif sort_by == "author":
-            query = query.join(models.Book.author).order_by(
-                asc(models.Author.name)
-                if sort_order == "asc"
-                else desc(models.Author.name)
-            )
-
-    return query.offset(offset).limit(limit).all()
+        query = query.order_by(models.Book.title, models.Book.id)
+        return query.offset(offset).limit(limit).all()
+
+    search = models.book_search
+    # Quoted, so that words are never read as FTS5 operators
+    match = " ".join(f'"{word}"*' for word in words)
+    candidates = select(search.c.rowid.label("book_id"), search.c.rank).where(
+        search.c.books_fts.op("MATCH")(match)
+    )
+    if SEARCH_RANK_WINDOW:
+        candidates = candidates.order_by(search.c.rowid.desc()).limit(
+            SEARCH_RANK_WINDOW
+        )
+    candidates = candidates.subquery()
+    # Rank and page on the index alone, then load just the page of books
+    ranked = (
+        select(candidates)
+        .order_by(candidates.c.rank, candidates.c.book_id)
+        .offset(offset)
+        .limit(limit)
+        .subquery()
+    )
+    return (
+        query.join(ranked, ranked.c.book_id == models.Book.id)
+        .order_by(ranked.c.rank, models.Book.id)
+        .all()
+    )
 
 
 # ------------------------------------
@@ -111,6 +430,12 @@ def get_books(
 # ------------------------------------
 
 
+AUTHOR_SORT_KEYS = {
+    "name": (models.Author.name, "name"),
+    "birthdate": (models.Author.birthdate, "birthdate"),
+}
+
+
 def create_author(db: Session, author: schemas.AuthorCreate) -> models.Author:
     """Create a new author in the database."""
     # Ensure that the author's name is unique'
@@ -134,6 +459,7 @@ def create_author(db: Session, author: schemas.AuthorCreate) -> models.Author:
     # Create and save the author in the database
     db_author = models.Author(**author.dict())
     db.add(db_author)
+    bump_catalog_version(db, "authors")
     db.commit()
     db.refresh(db_author)
     return db_author
@@ -146,58 +472,51 @@ def get_author(db: Session, author_id: int) -> models.Author:
     )
 
 
-def get_authors(
+@result_cache.cached(schemas.Author, tags=("catalog", "authors"))
+def get_author_rows(
     db: Session,
     offset: int = 0,
     limit: int = 10,
     sort_by: Optional[str] = None,
     sort_order: str = "asc",
-) -> list[models.Author]:
-    """Retrieve a list of authors with pagination."""
-    query = db.query(models.Author)
-    if sort_by:
-        if sort_by == "name":
-            query = query.order_by(
-                asc(models.Author.name)
-                if sort_order == "asc"
-                else desc(models.Author.name)
-            )
-        elif sort_by == "birthdate":
-            query = query.order_by(
-                asc(models.Author.birthdate)
-                if sort_order == "asc"
-                else desc(models.Author.birthdate)
-            )
-
-    return query.offset(offset).limit(limit).all()
+    cursor: Optional[str] = None,
+) -> Page:
+    """Retrieve a page of authors, as dicts of the columns of
+    schemas.Author."""
+    return _column_page(
+        db,
+        models.Author,
+        schemas.Author,
+        AUTHOR_SORT_KEYS,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+    )
 
 
-def get_author_books(
+@result_cache.cached(schemas.Book, tags=("catalog", "author:{author_id}"))
+def get_author_book_rows(
     db: Session,
     author_id: int,
     offset: int = 0,
     limit: int = 10,
     sort_by: Optional[str] = None,
     sort_order: str = "asc",
-) -> list[models.Book]:
-    """Retrieve a list of books by an author."""
-    query = db.query(models.Book).filter(models.Book.author_id == author_id)
-
-    if sort_by:
-        if sort_by == "title":
-            query = query.order_by(
-                asc(models.Book.title)
-                if sort_order == "asc"
-                else desc(models.Book.title)
-            )
-        elif sort_by == "publish_date":
-            query = query.order_by(
-                asc(models.Book.publish_date)
-                if sort_order == "asc"
-                else desc(models.Book.publish_date)
-            )
-
-    return query.offset(offset).limit(limit).all()
+    cursor: Optional[str] = None,
+) -> Page:
+    """Retrieve a page of books by an author, as dicts of the columns of
+    schemas.Book."""
+    return _book_row_page(
+        db,
+        models.Book.author_id == author_id,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+    )
 
 
 # ------------------------------------
@@ -205,6 +524,11 @@ def get_author_books(
 # ------------------------------------
 
 
+GENRE_SORT_KEYS = {
+    "name": (models.Genre.name, "name"),
+}
+
+
 def create_genre(db: Session, genre: schemas.GenreCreate) -> models.Genre:
     """Create a new genre in the database."""
     # Ensure that the genre's name is unique'
@@ -217,6 +541,7 @@ def create_genre(db: Session, genre: schemas.GenreCreate) -> models.Genre:
 
     db_genre = models.Genre(**genre.dict())
     db.add(db_genre)
+    bump_catalog_version(db, "genres")
     db.commit()
     db.refresh(db_genre)
     return db_genre
@@ -227,58 +552,50 @@ def get_genre(db: Session, genre_id: int) -> models.Genre:
     return db.query(models.Genre).filter(models.Genre.id == genre_id).first()
 
 
-def get_genres(
+@result_cache.cached(schemas.Genre, tags=("catalog", "genres"))
+def get_genre_rows(
     db: Session,
     offset: int = 0,
     limit: int = 10,
     sort_by: Optional[str] = None,
     sort_order: str = "asc",
-) -> list[models.Genre]:
-    """Retrieve a list of genres with pagination."""
-    query = db.query(models.Genre)
-    if sort_by:
-        if sort_by == "name":
-            query = query.order_by(
-                asc(models.Genre.name)
-                if sort_order == "asc"
-                else desc(models.Genre.name)
-            )
-
-    return query.offset(offset).limit(limit).all()
+    cursor: Optional[str] = None,
+) -> Page:
+    """Retrieve a page of genres, as dicts of the columns of schemas.Genre."""
+    return _column_page(
+        db,
+        models.Genre,
+        schemas.Genre,
+        GENRE_SORT_KEYS,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+    )
 
 
-def get_genre_books(
+@result_cache.cached(schemas.Book, tags=("catalog", "genre:{genre_id}"))
+def get_genre_book_rows(
     db: Session,
     genre_id: int,
     offset: int = 0,
     limit: int = 10,
     sort_by: Optional[str] = None,
     sort_order: str = "asc",
-) -> list[models.Book]:
-    """Retrieve a list of books by a genre."""
-    query = db.query(models.Book).filter(models.Book.genre_id == genre_id)
-
-    if sort_by:
-        if sort_by == "title":
-            query = query.order_by(
-                asc(models.Book.title)
-                if sort_order == "asc"
-                else desc(models.Book.title)
-            )
-        elif sort_by == "publish_date":
-            query = query.order_by(
-                asc(models.Book.publish_date)
-                if sort_order == "asc"
-                else desc(models.Book.publish_date)
-            )
-        elif sort_by == "author":
-            query = query.join(models.Book.author).order_by(
-                asc(models.Author.name)
-                if sort_order == "asc"
-                else desc(models.Author.name)
-            )
-
-    return query.offset(offset).limit(limit).all()
+    cursor: Optional[str] = None,
+) -> Page:
+    """Retrieve a page of books by a genre, as dicts of the columns of
+    schemas.Book."""
+    return _book_row_page(
+        db,
+        models.Book.genre_id == genre_id,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+    )
 
 
 # ------------------------------------
@@ -286,6 +603,15 @@ def get_genre_books(
 # ------------------------------------
 
 
+PUBLISHER_SORT_KEYS = {
+    "name": (models.Publisher.name, "name"),
+    "established_year": (
+        models.Publisher.established_year,
+        "established_year",
+    ),
+}
+
+
 def create_publisher(
     db: Session, publisher: schemas.PublisherCreate
 ) -> models.Publisher:
@@ -304,6 +630,7 @@ def create_publisher(
 
     db_publisher = models.Publisher(**publisher.dict())
     db.add(db_publisher)
+    bump_catalog_version(db, "publishers")
     db.commit()
     db.refresh(db_publisher)
     return db_publisher
@@ -318,30 +645,28 @@ def get_publisher(db: Session, publisher_id: int) -> models.Publisher:
     )
 
 
-def get_publishers(
+@result_cache.cached(schemas.Publisher, tags=("catalog", "publishers"))
+def get_publisher_rows(
     db: Session,
     offset: int = 0,
     limit: int = 10,
     sort_by: Optional[str] = None,
     sort_order: str = "asc",
-) -> list[models.Publisher]:
-    """Retrieve a list of genres with pagination."""
-    query = db.query(models.Publisher)
-    if sort_by:
-        if sort_by == "name":
-            query = query.order_by(
-                asc(models.Publisher.name)
-                if sort_order == "asc"
-                else desc(models.Publisher.name)
-            )
-        elif sort_by == "established_year":
-            query = query.order_by(
-                asc(models.Publisher.established_year)
-                if sort_order == "asc"
-                else desc(models.Publisher.established_year)
-            )
-
-    return query.offset(offset).limit(limit).all()
+    cursor: Optional[str] = None,
+) -> Page:
+    """Retrieve a page of publishers, as dicts of the columns of
+    schemas.Publisher."""
+    return _column_page(
+        db,
+        models.Publisher,
+        schemas.Publisher,
+        PUBLISHER_SORT_KEYS,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+    )
 
 
 # ------------------------------------
@@ -349,9 +674,22 @@ def get_publishers(
 # ------------------------------------
 
 
-def create_user(db: Session, user_data: schemas.UserCreate) -> models.User:
-    """Creates a new user with a hashed password."""
-    hashed_password = hash_password(user_data.password)
+USER_SORT_KEYS = {
+    "email": (models.User.email, "email"),
+}
+
+
+def create_user(
+    db: Session,
+    user_data: schemas.UserCreate,
+    hashed_password: Optional[str] = None,
+) -> models.User:
+    """Creates a new user with a hashed password.
+
+    The hash can be computed by the caller beforehand, so that bcrypt
+    does not have to run inside the database session."""
+    if hashed_password is None:
+        hashed_password = hash_password(user_data.password)
     db_user = models.User(
         email=user_data.email, hashed_password=hashed_password
     )
@@ -366,115 +704,168 @@ def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
 
-def get_users(
+def get_user_rows(
     db: Session,
     offset: int = 0,
     limit: int = 10,
     sort_by: Optional[str] = None,
     sort_order: str = "asc",
-) -> list[models.User]:
-    """Returns a list of users with pagination."""
-    query = db.query(models.User)
-    if sort_by:
-        if sort_by == "email":
-            query = query.order_by(
-                asc(models.User.email)
-                if sort_order == "asc"
-                else desc(models.User.email)
-            )
+    cursor: Optional[str] = None,
+) -> Page:
+    """Returns a page of users, as dicts of the columns of schemas.User."""
+    return _column_page(
+        db,
+        models.User,
+        schemas.User,
+        USER_SORT_KEYS,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+    )
+
 
-    return query.offset(offset).limit(limit).all()
+DEBTOR_SORT_KEYS = {
+    **USER_SORT_KEYS,
+    "active_loans": (models.User.active_loans, "active_loans"),
+    "oldest_loan_date": (models.User.oldest_loan_date, "oldest_loan_date"),
+}
 
 
-def get_debtors(
+def get_debtor_rows(
     db: Session,
     offset: int = 0,
     limit: int = 10,
     sort_by: Optional[str] = None,
     sort_order: str = "asc",
-) -> list[models.User]:
-    """Returns a list of users who have active borrowings."""
-    query = (
-        db.query(models.User)
-        .join(
-            models.BorrowingHistory,
-            models.User.id == models.BorrowingHistory.user_id,
-        )
-        .filter(models.BorrowingHistory.return_date.is_(None))
+    cursor: Optional[str] = None,
+) -> Page:
+    """Returns the users who have active borrowings, once each, with
+    their number of active loans and the date of the oldest one, as dicts
+    of the columns of schemas.Debtor.
+
+    Reads the loan summary kept on users, so a page costs the same
+    however many loans the library has."""
+    return _column_page(
+        db,
+        models.User,
+        schemas.Debtor,
+        DEBTOR_SORT_KEYS,
+        models.User.active_loans > 0,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
     )
 
-    if sort_by:
-        if sort_by == "email":
-            query = query.order_by(
-                asc(models.User.email)
-                if sort_order == "asc"
-                else desc(models.User.email)
-            )
-
-    return query.offset(offset).limit(limit).all()
-
 
 # ------------------------------------
 # Borrowing
 # ------------------------------------
 def get_available_books_count(db: Session, book_id: int) -> int:
     """Returns the count of available copies of a specific book."""
-    book = db.query(models.Book).filter(models.Book.id == book_id).first()
-    if not book:
+    available_copies = (
+        db.query(models.Book.available_copies)
+        .filter(models.Book.id == book_id)
+        .scalar()
+    )
+    if available_copies is None:
         raise HTTPException(status_code=404, detail="Book not found")
 
-    total_copies = book.number_of_copies
-    borrowed_count = (
-        db.query(models.BorrowingHistory)
-        .filter(
-            models.BorrowingHistory.book_id == book_id,
-            models.BorrowingHistory.return_date.is_(None),
-        )
-        .count()
-    )
+    return available_copies
+
 
-    return total_copies - borrowed_count
+# A loan is due LOAN_PERIOD_DAYS after it is borrowed
+LOAN_PERIOD_DAYS = config("LOAN_PERIOD_DAYS", default=14, cast=int)
 
 
 def borrow_book(
     db: Session, user_id: int, book_id: int
 ) -> models.BorrowingHistory:
     """Allows a user to borrow a book if they are
-    within their limit and the book is available."""
-    # Check user's current borrowings
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    current_borrowings = (
-        db.query(models.BorrowingHistory)
-        .filter(
-            models.BorrowingHistory.user_id == user_id,
+    within their limit and the book is available.
+
+    Runs as one transaction of three statements: lock the user row,
+    insert the loan only if the user is below max_books (INSERT ... SELECT)
+    and take a copy only if one is left (conditional UPDATE). Concurrent
+    requests can neither oversubscribe a book nor exceed a user's limit."""
+    # Serialize the borrowings of this user, a no-op on SQLite where
+    # writers are serialized anyway
+    db.query(models.User.id).filter(
+        models.User.id == user_id
+    ).with_for_update().scalar()
+
+    # Insert the loan if the book exists and the user is below the limit
+    active_loans = (
+        select(func.count(models.BorrowingHistory.id))
+        .where(
+            models.BorrowingHistory.user_id == models.User.id,
             models.BorrowingHistory.return_date.is_(None),
         )
-        .count()
+        .scalar_subquery()
     )
-
-    if current_borrowings >= user.max_books:
+    today = date.today()
+    eligible = (
+        select(
+            models.Book.id,
+            models.User.id,
+            literal(today, type_=Date),
+            literal(today + timedelta(days=LOAN_PERIOD_DAYS), type_=Date),
+        )
+        .join(models.Book, models.Book.id == book_id)
+        .where(
+            models.User.id == user_id,
+            active_loans < models.User.max_books,
+        )
+    )
+    borrowing = db.scalars(
+        insert(models.BorrowingHistory)
+        .from_select(
+            ["book_id", "user_id", "borrow_date", "due_date"], eligible
+        )
+        .returning(models.BorrowingHistory)
+    ).first()
+    if borrowing is None:
+        db.rollback()
+        get_available_books_count(db, book_id)  # 404 if the book is missing
         raise HTTPException(status_code=400, detail="Borrowing limit exceeded")
 
-    # Check if the book is available
-    available_copies = get_available_books_count(db, book_id)
-    if available_copies == 0:
+    # Take a copy, the WHERE clause makes the check and the decrement atomic
+    taken = (
+        db.query(models.Book)
+        .filter(models.Book.id == book_id, models.Book.available_copies > 0)
+        .update(
+            {models.Book.available_copies: models.Book.available_copies - 1},
+            synchronize_session=False,
+        )
+    )
+    if not taken:
+        db.rollback()
         raise HTTPException(status_code=400, detail="No available copies")
 
-    # Borrow the book
-    borrowing = models.BorrowingHistory(
-        user_id=user_id, book_id=book_id, borrow_date=date.today()
+    db.query(models.User).filter(models.User.id == user_id).update(
+        {
+            models.User.active_loans: models.User.active_loans + 1,
+            models.User.oldest_loan_date: func.coalesce(
+                models.User.oldest_loan_date, borrowing.borrow_date
+            ),
+        },
+        synchronize_session=False,
     )
-    db.add(borrowing)
     db.commit()
-    db.refresh(borrowing)
-
     return borrowing
 
 
 def return_book(
     db: Session, user_id: int, book_id: int
 ) -> models.BorrowingHistory:
-    """Allows a user to return a borrowed book."""
+    """Allows a user to return a borrowed book.
+
+    The loan is closed by an UPDATE conditional on it still being active,
+    and the book and user counters only change if that UPDATE closed it:
+    a concurrent or repeated return of the same loan gets 404."""
     borrowing = (
         db.query(models.BorrowingHistory)
         .filter(
@@ -484,47 +875,379 @@ def return_book(
         )
         .first()
     )
-
-    if borrowing is None:
+    closed = 0
+    if borrowing is not None:
+        closed = (
+            db.query(models.BorrowingHistory)
+            .filter(
+                models.BorrowingHistory.id == borrowing.id,
+                models.BorrowingHistory.return_date.is_(None),
+            )
+            .update(
+                {models.BorrowingHistory.return_date: date.today()},
+                synchronize_session=False,
+            )
+        )
+    if closed != 1:
+        db.rollback()
         raise HTTPException(
             status_code=404,
             detail="No active borrowing found for this book and user",
         )
 
-    borrowing.return_date = date.today()
+    db.query(models.Book).filter(models.Book.id == book_id).update(
+        {models.Book.available_copies: models.Book.available_copies + 1},
+        synchronize_session=False,
+    )
+    # Floored at zero, so a counter that drifted from the loans never
+    # goes negative
+    db.query(models.User).filter(models.User.id == user_id).update(
+        {
+            models.User.active_loans: case(
+                (models.User.active_loans > 0, models.User.active_loans - 1),
+                else_=0,
+            ),
+            models.User.oldest_loan_date: _oldest_active_loan_date(),
+        },
+        synchronize_session=False,
+    )
     db.commit()
     db.refresh(borrowing)
 
     return borrowing
 
 
+def _oldest_active_loan_date():
+    """Borrow date of the oldest active loan of the outer users row."""
+    return (
+        select(func.min(models.BorrowingHistory.borrow_date))
+        .where(
+            models.BorrowingHistory.user_id == models.User.id,
+            models.BorrowingHistory.return_date.is_(None),
+        )
+        .scalar_subquery()
+    )
+
+
+# The overdue sweep fines OVERDUE_FINE_PER_DAY (in the smallest currency
+# unit) per day past the due date, OVERDUE_SWEEP_BATCH_SIZE loans at a time
+OVERDUE_FINE_PER_DAY = config("OVERDUE_FINE_PER_DAY", default=10, cast=int)
+OVERDUE_SWEEP_BATCH_SIZE = config(
+    "OVERDUE_SWEEP_BATCH_SIZE", default=1000, cast=int
+)
+
+
+def _days_between(db: Session, start, end):
+    """Whole days from the start date column to the end date."""
+    end = literal(end, type_=Date)
+    if db.get_bind().dialect.name == "sqlite":
+        return cast(func.julianday(end) - func.julianday(start), Integer)
+    return end - start
+
+
+def get_overdue_loans(
+    db: Session,
+    offset: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+) -> Page:
+    """Returns the active loans past their due date, the longest overdue
+    first."""
+    loans = models.BorrowingHistory
+    query = (
+        db.query(loans)
+        .options(selectinload(loans.user))
+        .filter(loans.return_date.is_(None), loans.due_date < date.today())
+    )
+    return paginate(
+        query,
+        loans.id,
+        {"due_date": (loans.due_date, "due_date")},
+        sort_by="due_date",
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+    )
+
+
+def sweep_overdue_loans(
+    db: Session,
+    today: Optional[date] = None,
+    batch_size: int = OVERDUE_SWEEP_BATCH_SIZE,
+) -> int:
+    """Record the active loans past their due date in overdue_loans, with
+    their fine as of today, and return how many there are.
+
+    Loans are taken batch_size at a time in due date order. Each batch is
+    one UPDATE of the loans already recorded and one INSERT ... SELECT of
+    the new ones, committed on its own."""
+    today = today or date.today()
+    loans = models.BorrowingHistory
+    overdue = models.OverdueLoan
+    swept = 0
+    last = None
+    while True:
+        query = select(loans.due_date, loans.id).where(
+            loans.return_date.is_(None), loans.due_date < today
+        )
+        if last is not None:
+            query = query.where(tuple_(loans.due_date, loans.id) > last)
+        batch = db.execute(
+            query.order_by(loans.due_date, loans.id).limit(batch_size)
+        ).all()
+        if not batch:
+            return swept
+        ids = [loan_id for _, loan_id in batch]
+
+        days = _days_between(db, overdue.due_date, today)
+        db.execute(
+            update(overdue)
+            .where(overdue.loan_id.in_(ids))
+            .values(
+                days_overdue=days,
+                fine=days * OVERDUE_FINE_PER_DAY,
+                assessed_on=today,
+            )
+        )
+        days = _days_between(db, loans.due_date, today)
+        db.execute(
+            insert(overdue).from_select(
+                [
+                    "loan_id",
+                    "book_id",
+                    "user_id",
+                    "due_date",
+                    "days_overdue",
+                    "fine",
+                    "assessed_on",
+                ],
+                select(
+                    loans.id,
+                    loans.book_id,
+                    loans.user_id,
+                    loans.due_date,
+                    days,
+                    days * OVERDUE_FINE_PER_DAY,
+                    literal(today, type_=Date),
+                ).where(
+                    loans.id.in_(ids),
+                    ~exists().where(overdue.loan_id == loans.id),
+                ),
+            )
+        )
+        db.commit()
+        swept += len(ids)
+        last = tuple(batch[-1])
+
+
+def _expected_available_copies():
+    """Copies minus active loans, correlated to the outer books row."""
+    active_loans = (
+        select(func.count(models.BorrowingHistory.id))
+        .where(
+            models.BorrowingHistory.book_id == models.Book.id,
+            models.BorrowingHistory.return_date.is_(None),
+        )
+        .scalar_subquery()
+    )
+    return models.Book.number_of_copies - active_loans
+
+
+def get_inconsistent_available_copies(
+    db: Session,
+) -> list[tuple[int, int, int]]:
+    """Returns (book_id, stored, expected) for books whose
+    available_copies counter disagrees with their active loans."""
+    expected = _expected_available_copies()
+    return [
+        tuple(row)
+        for row in db.query(
+            models.Book.id, models.Book.available_copies, expected
+        )
+        .filter(models.Book.available_copies != expected)
+        .order_by(models.Book.id)
+    ]
+
+
+def repair_available_copies(db: Session) -> int:
+    """Recomputes drifted available_copies counters in one statement
+    and returns the number of books fixed."""
+    expected = _expected_available_copies()
+    repaired = (
+        db.query(models.Book)
+        .filter(models.Book.available_copies != expected)
+        .update(
+            {models.Book.available_copies: expected},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return repaired
+
+
 # ------------------------------------
 # Get Borrowing History
 # ------------------------------------
 
 
+# Returned loans older than ARCHIVE_AFTER_DAYS are moved to the archive
+# table ARCHIVE_BATCH_SIZE at a time by the archive-loans command.
+ARCHIVE_AFTER_DAYS = config("ARCHIVE_AFTER_DAYS", default=365, cast=int)
+ARCHIVE_BATCH_SIZE = config("ARCHIVE_BATCH_SIZE", default=1000, cast=int)
+
+LOAN_COLUMNS = (
+    "id",
+    "book_id",
+    "user_id",
+    "borrow_date",
+    "due_date",
+    "return_date",
+)
+
+
+def _all_loans():
+    """Loans of the borrowing_history table and of its archive together,
+    mapped as BorrowingHistory.
+
+    Filtering and ordering by indexed columns is pushed into both tables,
+    which SQLite merges without sorting."""
+    hot = select(
+        *(getattr(models.BorrowingHistory, name) for name in LOAN_COLUMNS)
+    )
+    archived = select(
+        *(getattr(models.ArchivedBorrowing, name) for name in LOAN_COLUMNS)
+    )
+    return aliased(
+        models.BorrowingHistory, union_all(hot, archived).subquery("loans")
+    )
+
+
+def _history_page(
+    db: Session,
+    owner: str,
+    owner_id: int,
+    offset: int,
+    limit: int,
+    sort_order: str,
+    cursor: Optional[str],
+    date_from: Optional[date],
+    date_to: Optional[date],
+    active_only: bool,
+) -> Page:
+    """Filter the loans of a book or user ("book_id" or "user_id" owner)
+    by borrow date and state, and page them by borrow date, newest first
+    unless sort_order is "asc"."""
+    # Archived loans are all returned, active ones never leave the table
+    loans = models.BorrowingHistory if active_only else _all_loans()
+    query = (
+        db.query(loans)
+        .options(selectinload(loans.user))
+        .filter(getattr(loans, owner) == owner_id)
+    )
+    if date_from is not None:
+        query = query.filter(loans.borrow_date >= date_from)
+    if date_to is not None:
+        query = query.filter(loans.borrow_date <= date_to)
+    if active_only:
+        query = query.filter(loans.return_date.is_(None))
+    return paginate(
+        query,
+        loans.id,
+        {"borrow_date": (loans.borrow_date, "borrow_date")},
+        sort_by="borrow_date",
+        sort_order=sort_order,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+    )
+
+
 def get_borrowing_history(
-    db: Session, book_id: int
-) -> list[models.BorrowingHistory]:
-    """Retrieve the borrowing history for a specific book."""
-    return (
-        db.query(models.BorrowingHistory)
-        .filter(models.BorrowingHistory.book_id == book_id)
-        .all()
+    db: Session,
+    book_id: int,
+    offset: int = 0,
+    limit: int = 10,
+    sort_order: str = "desc",
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    active_only: bool = False,
+) -> Page:
+    """Retrieve a page of the borrowing history of a specific book."""
+    return _history_page(
+        db,
+        "book_id",
+        book_id,
+        offset,
+        limit,
+        sort_order,
+        cursor,
+        date_from,
+        date_to,
+        active_only,
     )
 
 
 def get_user_borrowing_history(
-    db: Session, user_id: int
-) -> list[models.BorrowingHistory]:
-    """Retrieve the borrowing history for a specific user."""
-    return (
-        db.query(models.BorrowingHistory)
-        .filter(models.BorrowingHistory.user_id == user_id)
-        .all()
+    db: Session,
+    user_id: int,
+    offset: int = 0,
+    limit: int = 10,
+    sort_order: str = "desc",
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    active_only: bool = False,
+) -> Page:
+    """Retrieve a page of the borrowing history of a specific user."""
+    return _history_page(
+        db,
+        "user_id",
+        user_id,
+        offset,
+        limit,
+        sort_order,
+        cursor,
+        date_from,
+        date_to,
+        active_only,
     )
 
 
+def archive_returned_loans(
+    db: Session, returned_before: date, batch_size: int = ARCHIVE_BATCH_SIZE
+) -> int:
+    """Move loans returned before the given date to the archive table.
+
+    Loans move batch_size at a time, each batch in its own short
+    transaction, so the archiver can run next to the service. Returns the
+    number of archived loans."""
+    history = models.BorrowingHistory
+    # The newest loan stays, so that SQLite never hands its id out again
+    newest = select(func.max(history.id)).scalar_subquery()
+    archived = 0
+    while True:
+        ids = db.scalars(
+            select(history.id)
+            .where(history.return_date < returned_before, history.id < newest)
+            .order_by(history.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            return archived
+        db.execute(
+            insert(models.ArchivedBorrowing).from_select(
+                LOAN_COLUMNS,
+                select(
+                    *(getattr(history, name) for name in LOAN_COLUMNS)
+                ).where(history.id.in_(ids)),
+            )
+        )
+        db.execute(delete(history).where(history.id.in_(ids)))
+        db.commit()
+        archived += len(ids)
+
+
 def get_active_borrowing_book(db: Session, user_id) -> list[models.Book]:
     """Retrieve the currently borrowed book for a specific user."""
     return (
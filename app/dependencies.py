@@ -1,25 +1,55 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import AsyncIterator, Callable, Optional
+
 from app.jwt_handler import verify_token
-from db.engine import SessionLocal
-from fastapi import Depends, HTTPException
+from db.engine import (
+    SessionLocal,
+    AsyncSessionLocal,
+    ReplicaSessionLocals,
+    AsyncReplicaSessionLocals,
+    USE_ASYNC_DB,
+)
+from fastapi import Depends, HTTPException, Request, Response
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from app import crud
-from db import models
+from app import async_crud
+from app.session_router import SessionRouter
+from app.user_cache import AuthenticatedUser, user_cache
 
 # ------------------------------------
 # Dependency to get DB session
 # ------------------------------------
 
 
-def get_db() -> Session:
-    """Create a new database session for each request."""
-    db = SessionLocal()
+session_router = SessionRouter(SessionLocal, ReplicaSessionLocals)
+async_session_router = SessionRouter(
+    AsyncSessionLocal, AsyncReplicaSessionLocals
+)
+
+
+def get_sync_db(request: Request) -> Session:
+    """Create a new database session for each request, on a replica for
+    reads when replicas are configured."""
+    db = session_router.session_factory(request)()
     try:
         yield db
     finally:
         db.close()
 
 
+async def get_async_db(request: Request) -> AsyncIterator:
+    """Create a new async database session for each request, on a replica
+    for reads when replicas are configured."""
+    async with async_session_router.session_factory(request)() as db:
+        yield db
+
+
+# Routers depend on get_db, which hands out an AsyncSession when
+# USE_ASYNC_DB is enabled and a blocking Session otherwise.
+get_db = get_async_db if USE_ASYNC_DB else get_sync_db
+
+
 # ------------------------------------
 # Custom exceptions for error handling
 # ------------------------------------
@@ -38,21 +68,103 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
-    """Fetch the current user based on the JWT token."""
+) -> AuthenticatedUser:
+    """Fetch the current user based on the JWT token.
+
+    Users are served from the in-process user cache when possible, so
+    only a cache miss reads the users table."""
     credentials_exception = HTTPException(
         status_code=403, detail="Could not validate credentials"
     )
     email = verify_token(token, credentials_exception)
-    user = crud.get_user_by_email(db, email=email)
+    user = user_cache.get(email)
     if user is None:
-        raise credentials_exception
+        db_user = await async_crud.get_user_by_email(db, email=email)
+        if db_user is None:
+            raise credentials_exception
+        user = AuthenticatedUser.from_model(db_user)
+        user_cache.set(email, user)
     return user
 
 
-def admin_required(current_user: models.User = Depends(get_current_user)):
+def admin_required(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
     """Ensure the current user is an admin."""
     if not current_user.is_admin:
         raise HTTPException(
             status_code=403, detail="Operation not permitted. Admins only."
         )
+
+
+# ------------------------------------
+# Conditional GET for catalog resources
+# ------------------------------------
+
+
+def _not_modified(
+    request: Request, etag: str, last_modified: datetime = None
+) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since in its absence."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # The header has whole seconds, a write later within the same
+        # second must not compare as unmodified
+        return last_modified <= since
+    return False
+
+
+async def _resource_exists(
+    db: Session, request: Request, get_resource: Callable
+) -> bool:
+    """Whether the resource named by the route's path ids exists."""
+    try:
+        ids = [int(value) for value in request.path_params.values()]
+    except ValueError:
+        return False
+    return await get_resource(db, *ids) is not None
+
+
+def catalog_validators(
+    *tables: str, resource: Optional[Callable] = None
+) -> Callable:
+    """Dependency adding ETag/Last-Modified headers derived from the
+    versions of the catalog tables a response is built from.
+
+    A request whose validators still match gets 304 Not Modified before
+    the endpoint runs, so the list query is never executed. On routes
+    naming a resource by id, resource is its async getter: validators,
+    including If-None-Match: *, only match when it exists, and a missing
+    one gets the endpoint's 404."""
+
+    async def check_validators(
+        request: Request, response: Response, db: Session = Depends(get_db)
+    ) -> None:
+        versions = await async_crud.get_catalog_versions(db, tables)
+        etag = 'W/"%s"' % ".".join(
+            f"{table}-{versions[table][0]}" for table in tables
+        )
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        timestamps = [at for _, at in versions.values() if at is not None]
+        last_modified = None
+        if timestamps:
+            last_modified = max(timestamps).replace(tzinfo=timezone.utc)
+            headers["Last-Modified"] = format_datetime(
+                last_modified, usegmt=True
+            )
+
+        if _not_modified(request, etag, last_modified) and (
+            resource is None or await _resource_exists(db, request, resource)
+        ):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return check_validators
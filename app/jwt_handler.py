@@ -1,14 +1,30 @@
-from jose import JWTError, jwt
+import hashlib
+import time
+
+from jose import JWTError
 from datetime import datetime, timedelta
 from decouple import config
 
+from app.cache import TTLCache
+
 SECRET_KEY = config("SECRET_KEY")
 ALGORITHM = config("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = config("ACCESS_TOKEN_EXPIRE_MINUTES")
 
+# Verified tokens are cached until they expire, but never for longer than
+# TOKEN_CACHE_TTL seconds. TOKEN_CACHE_TTL=0 disables the cache.
+TOKEN_CACHE_SIZE = config("TOKEN_CACHE_SIZE", default=4096, cast=int)
+TOKEN_CACHE_TTL = config("TOKEN_CACHE_TTL", default=300, cast=float)
+
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     """Creates a JWT token with an expiration time."""
+    # Imported on first use, jose.jwt loads the cryptography backends and
+    # would add a large share of the app's import time
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -19,10 +35,38 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return encoded_jwt
 
 
+def _token_digest(token: str) -> bytes:
+    """Cache key of a token, bound to the current key and algorithm so
+    that rotating SECRET_KEY never serves claims verified with the old
+    one."""
+    return hashlib.sha256(
+        b"\0".join((SECRET_KEY.encode(), ALGORITHM.encode(), token.encode()))
+    ).digest()
+
+
+def decode_token(token: str) -> dict:
+    """Returns the claims of a valid token, verifying its signature only
+    the first time it is seen. Raises JWTError for invalid tokens."""
+    digest = _token_digest(token)
+    claims = token_cache.get(digest)
+    if claims is not None:
+        if "exp" not in claims or claims["exp"] > time.time():
+            return claims
+        token_cache.invalidate(digest)
+
+    from jose import jwt
+
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    lifetime = claims["exp"] - time.time() if "exp" in claims else None
+    if lifetime is None or lifetime > 0:
+        token_cache.set(digest, claims, ttl=lifetime)
+    return claims
+
+
 def verify_token(token: str, credentials_exception):
     """Verifies the token's validity and returns user data."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
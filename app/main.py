@@ -1,4 +1,10 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from decouple import config
+from fastapi import FastAPI, Request
+from app.negotiation import NegotiatedRoute
+from app.responses import NegotiatedResponse
+from app.session_router import pin_writers_to_primary
 from app.routers import (
     books,
     authors,
@@ -7,15 +13,53 @@ from app.routers import (
     auth,
     borrowings,
     users,
+    diagnostics,
 )
-from db.engine import engine
+from db.engine import REPLICA_DATABASE_URLS, engine
 from db.models import Base
+from db.query_counter import count_queries
+
+# Report the number of SQL statements run by each request
+QUERY_COUNT_HEADER = config("QUERY_COUNT_HEADER", default=False, cast=bool)
+
+# Create missing tables when the app starts. Disable it where Alembic
+# manages the schema, so that workers start without inspecting it.
+CREATE_TABLES_ON_STARTUP = config(
+    "CREATE_TABLES_ON_STARTUP", default=True, cast=bool
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the database tables, if enabled, before serving."""
+    if CREATE_TABLES_ON_STARTUP:
+        Base.metadata.create_all(bind=engine)
+    yield
 
-# Create the database tables
-Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(default_response_class=NegotiatedResponse, lifespan=lifespan)
+app.router.route_class = NegotiatedRoute
+
+# ------------------------------------
+# Middleware
+# ------------------------------------
+
+
+async def add_query_count_header(request: Request, call_next):
+    """Expose the statement count of the request as X-Query-Count."""
+    with count_queries() as counter:
+        response = await call_next(request)
+    response.headers["X-Query-Count"] = str(counter.count)
+    return response
+
+
+if QUERY_COUNT_HEADER:
+    app.middleware("http")(add_query_count_header)
+
+if REPLICA_DATABASE_URLS:
+    app.middleware("http")(pin_writers_to_primary)
+
 
 # ------------------------------------
 # Include Routers
@@ -28,6 +72,7 @@ app.include_router(authors.router)
 app.include_router(genres.router)
 app.include_router(publishers.router)
 app.include_router(borrowings.router)
+app.include_router(diagnostics.router)
 
 # ------------------------------------
 # Root Endpoint
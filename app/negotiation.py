@@ -0,0 +1,113 @@
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, Optional
+
+import msgpack
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+# Media types clients use for MessagePack, in Accept and Content-Type
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack", "application/vnd.msgpack")
+
+# Specificity of the Accept ranges matching both formats
+WILDCARDS = {"*/*": 0, "application/*": 1}
+
+# The media type negotiated for the response of the current request
+response_media_type: ContextVar[str] = ContextVar(
+    "response_media_type", default=JSON
+)
+
+
+def _quality(ranges: list[tuple[str, float]], media_types) -> tuple:
+    """The (quality, specificity) of the most specific range matching one
+    of media_types, as in RFC 9110 section 12.5.1."""
+    best = (0.0, -1)
+    for media_range, quality in ranges:
+        if media_range in media_types:
+            specificity = 2
+        else:
+            specificity = WILDCARDS.get(media_range, -1)
+        if specificity > best[1]:
+            best = (quality, specificity)
+    return best
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept: Optional[str]) -> str:
+    """The media type to respond with for an Accept header.
+
+    MessagePack when the client prefers it to JSON, JSON otherwise,
+    including when both are equally acceptable."""
+    ranges = []
+    for part in (accept or "").split(","):
+        media_range, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((media_range.strip().lower(), quality))
+
+    msgpack_quality = _quality(ranges, MSGPACK_TYPES)
+    if msgpack_quality[0] > 0 and msgpack_quality > _quality(ranges, (JSON,)):
+        return MSGPACK
+    return JSON
+
+
+def is_msgpack(content_type: Optional[str]) -> bool:
+    """Whether a Content-Type header denotes a MessagePack body."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return media_type in MSGPACK_TYPES
+
+
+class MsgPackRequest(Request):
+    """A request with a MessagePack body, decoded where FastAPI reads
+    JSON bodies."""
+
+    async def json(self):
+        if not hasattr(self, "_json"):
+            self._json = msgpack.unpackb(await self.body())
+        return self._json
+
+
+class NegotiatedRoute(APIRoute):
+    """Route class accepting MessagePack request bodies and answering in
+    MessagePack to clients that prefer it.
+
+    The negotiated media type is kept in response_media_type for the
+    response classes, JSON stays the default."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            if is_msgpack(request.headers.get("Content-Type")):
+                # FastAPI only parses bodies with a JSON content type
+                headers = [
+                    (key, value)
+                    for key, value in request.scope["headers"]
+                    if key != b"content-type"
+                ]
+                headers.append((b"content-type", JSON.encode()))
+                request = MsgPackRequest(
+                    {**request.scope, "headers": headers}, request.receive
+                )
+
+            token = response_media_type.set(
+                negotiate(request.headers.get("Accept"))
+            )
+            try:
+                response = await handler(request)
+            finally:
+                response_media_type.reset(token)
+            if response.media_type in (JSON, MSGPACK):
+                response.headers.setdefault("Vary", "Accept")
+            return response
+
+        return negotiated_handler
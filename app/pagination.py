@@ -0,0 +1,117 @@
+import base64
+import binascii
+import json
+from datetime import date
+from operator import attrgetter
+from typing import Any, Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+# Maps a sort_by option to the column it orders by and the attribute path
+# that reads the same value from a result row.
+SortKeys = dict[str, tuple[Any, str]]
+
+
+class Page(list):
+    """A page of results, with the cursor pointing after its last row."""
+
+    def __init__(self, items=(), next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(
+    sort_by: Optional[str], sort_order: str, values: list
+) -> str:
+    """Serialize the sort key of a row into an opaque cursor."""
+    payload = {
+        "s": sort_by,
+        "o": sort_order,
+        "v": [v.isoformat() if isinstance(v, date) else v for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, sort_by: Optional[str], sort_order: str, columns: list
+) -> list:
+    """Read the sort key back from a cursor issued for the same ordering."""
+    invalid_cursor = HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        values = payload["v"]
+        if (
+            payload["s"] != sort_by
+            or payload["o"] != sort_order
+            or len(values) != len(columns)
+        ):
+            raise invalid_cursor
+        return [
+            _coerce(value, column) for value, column in zip(values, columns)
+        ]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise invalid_cursor
+
+
+def _coerce(value: Any, column) -> Any:
+    """Convert a JSON value back to the python type of its column."""
+    if value is not None and column.type.python_type is date:
+        return date.fromisoformat(value)
+    return value
+
+
+def paginate(
+    query: Query,
+    id_column,
+    sort_keys: SortKeys,
+    sort_by: Optional[str] = None,
+    sort_order: str = "asc",
+    offset: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+) -> Page:
+    """Order the query by sort_by with an id tie-breaker and fetch a page.
+
+    With a cursor the page starts right after the row the cursor was
+    issued for, using a keyset predicate instead of skipping offset rows.
+    Unknown sort_by values fall back to ordering by id only."""
+    if sort_by in sort_keys:
+        column, attribute = sort_keys[sort_by]
+        columns = [column, id_column]
+        getters = [attrgetter(attribute), attrgetter(id_column.key)]
+    else:
+        sort_by = None
+        columns = [id_column]
+        getters = [attrgetter(id_column.key)]
+
+    descending = sort_order != "asc"
+    query = query.order_by(
+        *(column.desc() if descending else column.asc() for column in columns)
+    )
+
+    if cursor:
+        values = decode_cursor(cursor, sort_by, sort_order, columns)
+        key, after = tuple_(*columns), tuple_(*values)
+        query = query.filter(key < after if descending else key > after)
+    else:
+        query = query.offset(offset)
+
+    items = query.limit(limit).all()
+    next_cursor = None
+    if items and len(items) == limit:
+        last = items[-1]
+        next_cursor = encode_cursor(
+            sort_by, sort_order, [getter(last) for getter in getters]
+        )
+    return Page(items, next_cursor)
+
+
+def with_next_cursor(response: Response, page: Page) -> Page:
+    """Expose the cursor of the following page as X-Next-Cursor."""
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page
@@ -0,0 +1,306 @@
+import pickle
+from datetime import datetime
+from functools import wraps
+from inspect import signature
+from threading import Lock
+from typing import Any, Callable, Iterable, Optional
+
+from decouple import config
+from pydantic import BaseModel
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.orm import Session, object_session
+
+from app.cache import TTLCache
+from app.pagination import Page
+from db import models
+
+# Catalog list results are cached for up to RESULT_CACHE_TTL seconds, in at
+# most RESULT_CACHE_SIZE entries and RESULT_CACHE_MAX_BYTES pickled bytes.
+# RESULT_CACHE_BACKEND selects the backend, "none" disables the cache.
+RESULT_CACHE_BACKEND = config("RESULT_CACHE_BACKEND", default="memory")
+RESULT_CACHE_SIZE = config("RESULT_CACHE_SIZE", default=1024, cast=int)
+RESULT_CACHE_MAX_BYTES = config(
+    "RESULT_CACHE_MAX_BYTES", default=32 * 1024 * 1024, cast=int
+)
+RESULT_CACHE_TTL = config("RESULT_CACHE_TTL", default=300, cast=float)
+
+
+class MemoryBackend:
+    """In-process LRU backend, bounded by entry count and pickled size.
+
+    Entries are stored under keys that include the versions of their tags,
+    so invalidating a tag makes its entries unreachable and they age out."""
+
+    def __init__(self, maxsize: int, maxbytes: int, ttl: float):
+        self.entries = TTLCache(
+            maxsize=maxsize, ttl=ttl, maxbytes=maxbytes, sizeof=len
+        )
+        self._tag_versions: dict[str, int] = {}
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.entries.get(key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self.entries.set(key, value)
+
+    def tag_versions(self, tags: Iterable[str]) -> tuple:
+        with self._lock:
+            return tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
+    def bump_tags(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+        with self._lock:
+            self._tag_versions.clear()
+
+    def stats(self) -> dict:
+        return self.entries.stats()
+
+
+BACKENDS = {"memory": MemoryBackend}
+
+
+# Tags are versioned in catalog_versions too, under this prefix, so that
+# every worker sees the invalidations of the others
+TAG_PREFIX = "tag:"
+
+
+def _shared_tag_versions(db: Session, tags: list) -> tuple:
+    """The versions of the tags recorded in the database."""
+    names = [TAG_PREFIX + tag for tag in tags]
+    versions = dict(
+        db.query(
+            models.CatalogVersion.name, models.CatalogVersion.version
+        ).filter(models.CatalogVersion.name.in_(names))
+    )
+    return tuple(versions.get(name, 0) for name in names)
+
+
+def _record_tags(db: Any, tags: Iterable[str]) -> None:
+    """Bump the shared versions of the tags within the caller's
+    transaction, db being a session or a connection."""
+    table = models.CatalogVersion.__table__
+    now = datetime.utcnow()
+    names = sorted({TAG_PREFIX + tag for tag in tags})
+    bumped = db.execute(
+        update(table)
+        .where(table.c.name.in_(names))
+        .values(version=table.c.version + 1, updated_at=now)
+    ).rowcount
+    if bumped < len(names):
+        # First write to these tags
+        existing = set(
+            db.execute(select(table.c.name).where(table.c.name.in_(names)))
+            .scalars()
+            .all()
+        )
+        db.execute(
+            insert(table),
+            [
+                {"name": name, "version": 1, "updated_at": now}
+                for name in names
+                if name not in existing
+            ],
+        )
+
+
+def _snapshot(result: Any, schema: type[BaseModel]) -> Any:
+    """Copy ORM rows into response models, which outlive the session."""
+    if isinstance(result, list):
+        return Page(
+            [
+                schema.model_validate(row, from_attributes=True)
+                for row in result
+            ],
+            next_cursor=getattr(result, "next_cursor", None),
+        )
+    return schema.model_validate(result, from_attributes=True)
+
+
+class ResultCache:
+    """Caches the results of catalog read functions, tagged by entity."""
+
+    def __init__(self, backend: Optional[MemoryBackend]):
+        self.backend = backend
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def cached(self, schema: type[BaseModel], tags: tuple = ()) -> Callable:
+        """Cache a CRUD read function taking the session first.
+
+        Tags are formatted with the call's arguments, e.g. "author:{author_id}"
+        ties an entry to the author it was read for. Their versions in the
+        database are part of the key, so a write committed by another worker
+        makes the entry stale too. The result is returned as response models
+        rather than ORM rows."""
+
+        def decorator(func: Callable) -> Callable:
+            parameters = signature(func)
+
+            @wraps(func)
+            def wrapper(db: Session, *args, **kwargs):
+                if self.backend is None:
+                    return func(db, *args, **kwargs)
+                bound = parameters.bind(db, *args, **kwargs)
+                bound.apply_defaults()
+                arguments = dict(list(bound.arguments.items())[1:])
+                entry_tags = [tag.format(**arguments) for tag in tags]
+                # Versions are read before the query runs, so a write that
+                # commits meanwhile leaves this entry already outdated
+                key = repr(
+                    (
+                        func.__qualname__,
+                        sorted(arguments.items()),
+                        self.backend.tag_versions(entry_tags),
+                        _shared_tag_versions(db, entry_tags),
+                    )
+                )
+                data = self.backend.get(key)
+                if data is not None:
+                    return pickle.loads(data)
+                result = _snapshot(func(db, *args, **kwargs), schema)
+                self.backend.set(key, pickle.dumps(result))
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, *tags: str) -> None:
+        """Make every entry carrying one of the tags stale."""
+        if self.backend is not None and tags:
+            self.backend.bump_tags(tags)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+        self.invalidations = 0
+
+    def stats(self) -> dict:
+        if self.backend is None:
+            return {"backend": "none"}
+        return {
+            "backend": RESULT_CACHE_BACKEND,
+            "invalidations": self.invalidations,
+            **self.backend.stats(),
+        }
+
+
+result_cache = ResultCache(
+    BACKENDS[RESULT_CACHE_BACKEND](
+        maxsize=RESULT_CACHE_SIZE,
+        maxbytes=RESULT_CACHE_MAX_BYTES,
+        ttl=RESULT_CACHE_TTL,
+    )
+    if RESULT_CACHE_BACKEND != "none"
+    else None
+)
+
+
+# ------------------------------------
+# Invalidation
+# ------------------------------------
+#
+# Every read function depends on the "catalog" tag plus the tags of what it
+# lists. Writes collect the tags they affect per session: their shared
+# versions are bumped on flush, in the writing transaction, and they are
+# invalidated in this process once it commits. A new book only invalidates
+# the book list and the lists of its author and genre. Renaming or deleting
+# an author or genre changes books nested in many lists, so it invalidates
+# "catalog". Bulk Core statements bypass these events and have to call
+# mark_stale themselves.
+
+
+def _stale_tags(session: Session) -> set:
+    return session.info.setdefault("stale_result_tags", set())
+
+
+def _changed_values(target: Any, attribute: str) -> set:
+    """Current and, for updates, previous values of an attribute."""
+    history = inspect(target).attrs[attribute].history
+    return {getattr(target, attribute), *(history.deleted or ())}
+
+
+def _book_tags(target: models.Book) -> set:
+    return {
+        "books",
+        *(f"author:{id_}" for id_ in _changed_values(target, "author_id")),
+        *(f"genre:{id_}" for id_ in _changed_values(target, "genre_id")),
+    }
+
+
+def _mark(target: Any, tags: set) -> None:
+    session = object_session(target)
+    if session is not None:
+        _stale_tags(session).update(tags)
+        session.info.setdefault("unrecorded_result_tags", set()).update(tags)
+
+
+def mark_stale(session: Session, *tags: str) -> None:
+    """Invalidate the tags once the session commits, for writes the ORM
+    events do not see."""
+    _record_tags(session, tags)
+    _stale_tags(session).update(tags)
+
+
+@event.listens_for(models.Book, "after_insert")
+@event.listens_for(models.Book, "after_update")
+@event.listens_for(models.Book, "after_delete")
+def _mark_book_stale(mapper, connection, target: models.Book) -> None:
+    _mark(target, _book_tags(target))
+
+
+@event.listens_for(models.Author, "after_insert")
+def _mark_authors_stale(mapper, connection, target: models.Author) -> None:
+    _mark(target, {"authors"})
+
+
+@event.listens_for(models.Genre, "after_insert")
+def _mark_genres_stale(mapper, connection, target: models.Genre) -> None:
+    _mark(target, {"genres"})
+
+
+@event.listens_for(models.Author, "after_update")
+@event.listens_for(models.Author, "after_delete")
+@event.listens_for(models.Genre, "after_update")
+@event.listens_for(models.Genre, "after_delete")
+def _mark_catalog_stale(mapper, connection, target: Any) -> None:
+    _mark(target, {"catalog"})
+
+
+@event.listens_for(models.Publisher, "after_insert")
+@event.listens_for(models.Publisher, "after_update")
+@event.listens_for(models.Publisher, "after_delete")
+def _mark_publishers_stale(
+    mapper, connection, target: models.Publisher
+) -> None:
+    _mark(target, {"publishers"})
+
+
+@event.listens_for(Session, "after_flush")
+def _record_stale_results(session: Session, flush_context) -> None:
+    tags = session.info.pop("unrecorded_result_tags", None)
+    if tags:
+        _record_tags(session.connection(), tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_stale_results(session: Session) -> None:
+    tags = session.info.pop("stale_result_tags", None)
+    if tags:
+        result_cache.invalidate(*tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_results(session: Session) -> None:
+    session.info.pop("stale_result_tags", None)
+    session.info.pop("unrecorded_result_tags", None)
@@ -1,35 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from app import schemas, crud, security
+from app import schemas, async_crud, security
 from app.dependencies import get_db
 from app.jwt_handler import create_access_token
+from app.negotiation import NegotiatedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
 
 
 @router.post("/register", response_model=schemas.User)
-def register_user(
+async def register_user(
     user_data: schemas.UserCreate, db: Session = Depends(get_db)
 ):
     # Check if a user with this email already exists
-    existing_user = crud.get_user_by_email(db, email=user_data.email)
+    existing_user = await async_crud.get_user_by_email(
+        db, email=user_data.email
+    )
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
+    # Hash the password on the dedicated pool, bcrypt is CPU-bound
+    hashed_password = await security.hash_password_async(user_data.password)
+
     # Create a new user
-    new_user = crud.create_user(db, user_data)
+    new_user = await async_crud.create_user(
+        db, user_data, hashed_password=hashed_password
+    )
     return new_user
 
 
 @router.post("/login")
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
 ):
-    user = crud.get_user_by_email(db, email=form_data.username)
+    user = await async_crud.get_user_by_email(db, email=form_data.username)
     # Verify user's email and password
-    if not user or not security.verify_password(
+    if not user or not await security.verify_password_async(
         form_data.password, user.hashed_password
     ):
         raise HTTPException(
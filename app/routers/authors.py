@@ -1,13 +1,22 @@
-from typing import Literal
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.schemas import Author, AuthorCreate, Book
-from app.crud import create_author, get_author, get_authors, get_author_books
-from app.dependencies import get_db, admin_required
+from app.async_crud import (
+    create_author,
+    get_author,
+    get_author_rows,
+    get_author_book_rows,
+)
+from app.responses import ListSerializer
+from app.dependencies import get_db, admin_required, catalog_validators
+from app.negotiation import NegotiatedRoute
 from db import models
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
+author_list = ListSerializer(Author)
+book_list = ListSerializer(Book)
 
 # ------------------------------------
 # Endpoints for Authors
@@ -21,56 +30,82 @@ async def create_author_endpoint(
     current_user: models.User = Depends(admin_required),
 ) -> Author:
     """Create a new author."""
-    return create_author(db=db, author=author)
+    return await create_author(db=db, author=author)
 
 
-@router.get("/authors/", response_model=list[Author])
+@router.get(
+    "/authors/",
+    response_model=list[Author],
+    dependencies=[Depends(catalog_validators("authors"))],
+)
 async def get_authors_endpoint(
+    response: Response,
     offset: int = 0,
     limit: int = 10,
     db: Session = Depends(get_db),
     sort_by: Literal["name", "birthdate"] = "name",
     sort_order: Literal["asc", "desc"] = "asc",
-) -> list[Author]:
+    cursor: Optional[str] = None,
+) -> Response:
     """Retrieve a list of authors with pagination."""
-    return get_authors(
+    page = await get_author_rows(
         db=db,
         offset=offset,
         limit=limit,
         sort_by=sort_by,
         sort_order=sort_order,
+        cursor=cursor,
     )
+    return author_list.response(response, page)
 
 
-@router.get("/authors/{author_id}", response_model=Author)
+@router.get(
+    "/authors/{author_id}",
+    response_model=Author,
+    dependencies=[Depends(catalog_validators("authors", resource=get_author))],
+)
 async def get_author_endpoint(
     author_id: int, db: Session = Depends(get_db)
 ) -> Author:
     """Retrieve an author by their ID."""
-    db_author = get_author(db=db, author_id=author_id)
+    db_author = await get_author(db=db, author_id=author_id)
     if db_author is None:
         raise HTTPException(status_code=404, detail="Author not found")
     return db_author
 
 
-@router.get("/authors/{author_id}/books", response_model=list[Book])
+@router.get(
+    "/authors/{author_id}/books",
+    response_model=list[Book],
+    dependencies=[
+        Depends(
+            catalog_validators(
+                "books", "authors", "genres", resource=get_author
+            )
+        )
+    ],
+)
 async def get_author_books_endpoint(
+    response: Response,
     author_id: int,
     db: Session = Depends(get_db),
     offset: int = 0,
     limit: int = 10,
     sort_by: str = "title",
     sort_order: str = "asc",
-) -> list[Book]:
+    cursor: Optional[str] = None,
+) -> Response:
     """Retrieve books by an author."""
-    author = get_author(db=db, author_id=author_id)
+    author = await get_author(db=db, author_id=author_id)
     if author is None:
         raise HTTPException(status_code=404, detail="Author not found")
-    return get_author_books(
+    page = await get_author_book_rows(
         db=db,
         author_id=author_id,
         offset=offset,
         limit=limit,
         sort_by=sort_by,
         sort_order=sort_order,
+        cursor=cursor,
     )
+    return book_list.response(response, page)
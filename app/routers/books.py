@@ -1,14 +1,30 @@
-from typing import Literal
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.schemas import Book, BookCreate
-from app.crud import create_book, get_book, get_books
-from app.dependencies import get_db, admin_required
+from app.book_export import FORMATS, export_books
+from app.book_import import import_books_async, guess_format
+from app.schemas import Book, BookCreate, BookImportReport
+from app.async_crud import (
+    create_book,
+    get_book,
+    get_book_rows,
+    search_books,
+)
+from app.responses import ListSerializer
+from app.dependencies import (
+    get_db,
+    admin_required,
+    catalog_validators,
+    get_current_user,
+)
+from app.negotiation import NegotiatedRoute
 from db import models
 
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
+book_list = ListSerializer(Book)
 
 # ------------------------------------
 # Endpoints for Books
@@ -22,33 +38,102 @@ async def create_book_endpoint(
     current_user: models.User = Depends(admin_required),
 ) -> Book:
     """Create a new book."""
-    return create_book(db=db, book=book)
+    return await create_book(db=db, book=book)
 
 
-@router.get("/books/", response_model=list[Book])
+@router.post("/books/import", response_model=BookImportReport)
+async def import_books_endpoint(
+    file: UploadFile,
+    format: Optional[Literal["csv", "ndjson", "msgpack"]] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(admin_required),
+) -> BookImportReport:
+    """Import books from an uploaded CSV, NDJSON or msgpack file.
+
+    The format defaults to the one implied by the file name. Valid rows are
+    imported even if others fail, the report lists the failed rows."""
+    return await import_books_async(
+        db, file.file, format or guess_format(file.filename)
+    )
+
+
+@router.get(
+    "/books/",
+    response_model=list[Book],
+    dependencies=[Depends(catalog_validators("books", "authors", "genres"))],
+)
 async def get_books_endpoint(
+    response: Response,
     offset: int = 0,
     limit: int = 10,
     sort_by: Literal["title", "author", "publish_date"] = "title",
     sort_order: Literal["asc", "desc"] = "asc",
     db: Session = Depends(get_db),
-) -> list[Book]:
+    cursor: Optional[str] = None,
+) -> Response:
     """Retrieve a list of books with pagination."""
-    return get_books(
+    page = await get_book_rows(
         db=db,
         offset=offset,
         limit=limit,
         sort_by=sort_by,
         sort_order=sort_order,
+        cursor=cursor,
+    )
+    return book_list.response(response, page)
+
+
+@router.get(
+    "/books/search",
+    response_model=list[Book],
+    dependencies=[Depends(catalog_validators("books", "authors", "genres"))],
+)
+async def search_books_endpoint(
+    q: str,
+    offset: int = 0,
+    limit: int = 10,
+    db: Session = Depends(get_db),
+) -> list[Book]:
+    """Search books by title and author name, best matches first."""
+    return await search_books(db=db, q=q, offset=offset, limit=limit)
+
+
+@router.get(
+    "/books/export",
+    response_class=StreamingResponse,
+    dependencies=[
+        Depends(get_current_user),
+        Depends(catalog_validators("books", "authors", "genres")),
+    ],
+)
+async def export_books_endpoint(
+    response: Response,
+    format: Literal["ndjson", "csv", "msgpack"] = "ndjson",
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    """Stream the whole catalog as NDJSON, CSV or msgpack."""
+    # A returned response does not get the validators set on `response`
+    headers = dict(response.headers)
+    headers["Content-Disposition"] = f'attachment; filename="books.{format}"'
+    return StreamingResponse(
+        export_books(db, format), media_type=FORMATS[format], headers=headers
     )
 
 
-@router.get("/books/{book_id}", response_model=Book)
+@router.get(
+    "/books/{book_id}",
+    response_model=Book,
+    dependencies=[
+        Depends(
+            catalog_validators("books", "authors", "genres", resource=get_book)
+        )
+    ],
+)
 async def get_book_endpoint(
     book_id: int, db: Session = Depends(get_db)
 ) -> Book:
     """Retrieve a book by its ID."""
-    db_book = get_book(db=db, book_id=book_id)
+    db_book = await get_book(db=db, book_id=book_id)
     if db_book is None:
         raise HTTPException(status_code=404, detail="Book not found")
     return db_book
@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 from app.schemas import BorrowingHistory, BorrowingHistoryCreate
-from app.crud import get_borrowing_history, borrow_book, return_book
+from app.async_crud import (
+    get_borrowing_history,
+    get_overdue_loans,
+    borrow_book,
+    return_book,
+)
 from app.dependencies import get_db, admin_required, get_current_user
+from app.pagination import with_next_cursor
+from app.negotiation import NegotiatedRoute
 from db import models
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
 
 
 # ------------------------------------
@@ -18,7 +28,7 @@ async def borrow_book_endpoint(
     current_user: models.User = Depends(get_current_user),
 ) -> BorrowingHistory:
     """Borrow a book."""
-    return borrow_book(db=db, book_id=book_id, user_id=current_user.id)
+    return await borrow_book(db=db, book_id=book_id, user_id=current_user.id)
 
 
 @router.post("/books/{book_id}/return", response_model=BorrowingHistoryCreate)
@@ -28,14 +38,49 @@ async def return_book_endpoint(
     current_user: models.User = Depends(get_current_user),
 ) -> BorrowingHistory:
     """Borrow a book."""
-    return return_book(db=db, book_id=book_id, user_id=current_user.id)
+    return await return_book(db=db, book_id=book_id, user_id=current_user.id)
 
 
 @router.get("/books/{book_id}/history", response_model=list[BorrowingHistory])
 async def get_borrowing_history_endpoint(
+    response: Response,
     book_id: int,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(admin_required),
+    offset: int = 0,
+    limit: int = 10,
+    sort_order: Literal["asc", "desc"] = "desc",
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    active_only: bool = False,
+) -> list[BorrowingHistory]:
+    """Retrieve borrowing history for a specific book, newest first."""
+    page = await get_borrowing_history(
+        db=db,
+        book_id=book_id,
+        offset=offset,
+        limit=limit,
+        sort_order=sort_order,
+        cursor=cursor,
+        date_from=date_from,
+        date_to=date_to,
+        active_only=active_only,
+    )
+    return with_next_cursor(response, page)
+
+
+@router.get("/overdue", response_model=list[BorrowingHistory])
+async def get_overdue_loans_endpoint(
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(admin_required),
+    offset: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
 ) -> list[BorrowingHistory]:
-    """Retrieve borrowing history for a specific book."""
-    return get_borrowing_history(db=db, book_id=book_id)
+    """Retrieve the active loans past their due date, oldest due first."""
+    page = await get_overdue_loans(
+        db=db, offset=offset, limit=limit, cursor=cursor
+    )
+    return with_next_cursor(response, page)
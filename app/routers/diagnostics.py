@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends
+
+from app.dependencies import admin_required
+from app.jwt_handler import token_cache
+from app.result_cache import result_cache
+from app.security import hashing_pool
+from app.user_cache import user_cache
+from app.negotiation import NegotiatedRoute
+from db.engine import (
+    async_engine,
+    async_replica_engines,
+    engine,
+    replica_engines,
+)
+from db.pool import pool_stats
+
+router = APIRouter(route_class=NegotiatedRoute)
+
+# ------------------------------------
+# Endpoints for runtime diagnostics
+# ------------------------------------
+
+
+@router.get(
+    "/diagnostics/password-hashing", dependencies=[Depends(admin_required)]
+)
+async def get_password_hashing_stats_endpoint() -> dict:
+    """Report the queue depth and latency of the password hashing pool."""
+    return hashing_pool.stats()
+
+
+@router.get("/diagnostics/caches", dependencies=[Depends(admin_required)])
+async def get_cache_stats_endpoint() -> dict:
+    """Report the size and hit/miss counters of the in-process caches."""
+    return {
+        "users": user_cache.stats(),
+        "tokens": token_cache.stats(),
+        "results": result_cache.stats(),
+    }
+
+
+@router.get(
+    "/diagnostics/database-pool", dependencies=[Depends(admin_required)]
+)
+async def get_database_pool_stats_endpoint() -> dict:
+    """Report the occupancy and checkout waits of the connection pools."""
+    return {
+        "sync": pool_stats(engine),
+        "async": (
+            pool_stats(async_engine.sync_engine)
+            if async_engine is not None
+            else None
+        ),
+        "replicas": [pool_stats(replica) for replica in replica_engines],
+        "async_replicas": [
+            pool_stats(replica.sync_engine)
+            for replica in async_replica_engines
+        ],
+    }
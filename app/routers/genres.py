@@ -1,13 +1,22 @@
-from typing import Literal
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.schemas import Genre, GenreCreate, Book
-from app.crud import create_genre, get_genre, get_genres, get_genre_books
-from app.dependencies import get_db, admin_required
+from app.async_crud import (
+    create_genre,
+    get_genre,
+    get_genre_rows,
+    get_genre_book_rows,
+)
+from app.responses import ListSerializer
+from app.dependencies import get_db, admin_required, catalog_validators
+from app.negotiation import NegotiatedRoute
 from db import models
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
+genre_list = ListSerializer(Genre)
+book_list = ListSerializer(Book)
 
 # ------------------------------------
 # Endpoints for Genres
@@ -21,56 +30,82 @@ async def create_genre_endpoint(
     current_user: models.User = Depends(admin_required),
 ) -> Genre:
     """Create a new genre."""
-    return create_genre(db=db, genre=genre)
+    return await create_genre(db=db, genre=genre)
 
 
-@router.get("/genres/", response_model=list[Genre])
+@router.get(
+    "/genres/",
+    response_model=list[Genre],
+    dependencies=[Depends(catalog_validators("genres"))],
+)
 async def get_genres_endpoint(
+    response: Response,
     offset: int = 0,
     limit: int = 10,
     sort_by: str = "name",
     sort_order: Literal["asc", "desc"] = "asc",
     db: Session = Depends(get_db),
-) -> list[Genre]:
+    cursor: Optional[str] = None,
+) -> Response:
     """Retrieve a list of genres with pagination."""
-    return get_genres(
+    page = await get_genre_rows(
         db=db,
         offset=offset,
         limit=limit,
         sort_by=sort_by,
         sort_order=sort_order,
+        cursor=cursor,
     )
+    return genre_list.response(response, page)
 
 
-@router.get("/genres/{genre_id}", response_model=Genre)
+@router.get(
+    "/genres/{genre_id}",
+    response_model=Genre,
+    dependencies=[Depends(catalog_validators("genres", resource=get_genre))],
+)
 async def get_genre_endpoint(
     genre_id: int, db: Session = Depends(get_db)
 ) -> Genre:
     """Retrieve a genre by its ID."""
-    db_genre = get_genre(db=db, genre_id=genre_id)
+    db_genre = await get_genre(db=db, genre_id=genre_id)
     if db_genre is None:
         raise HTTPException(status_code=404, detail="Genre not found")
     return db_genre
 
 
-@router.get("/genres/{genre_id}/books", response_model=list[Book])
+@router.get(
+    "/genres/{genre_id}/books",
+    response_model=list[Book],
+    dependencies=[
+        Depends(
+            catalog_validators(
+                "books", "authors", "genres", resource=get_genre
+            )
+        )
+    ],
+)
 async def get_author_books_endpoint(
+    response: Response,
     genre_id: int,
     db: Session = Depends(get_db),
     offset: int = 0,
     limit: int = 10,
     sort_by: str = "title",
     sort_order: str = "asc",
-) -> list[Book]:
+    cursor: Optional[str] = None,
+) -> Response:
     """Retrieve books by an author."""
-    genre = get_genre(db=db, genre_id=genre_id)
+    genre = await get_genre(db=db, genre_id=genre_id)
     if genre is None:
         raise HTTPException(status_code=404, detail="Genre not found")
-    return get_genre_books(
+    page = await get_genre_book_rows(
         db=db,
         genre_id=genre_id,
         offset=offset,
         limit=limit,
         sort_by=sort_by,
         sort_order=sort_order,
+        cursor=cursor,
     )
+    return book_list.response(response, page)
@@ -1,13 +1,20 @@
-from typing import Literal
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.schemas import Publisher, PublisherCreate
-from app.crud import create_publisher, get_publisher, get_publishers
-from app.dependencies import get_db, admin_required
+from app.async_crud import (
+    create_publisher,
+    get_publisher,
+    get_publisher_rows,
+)
+from app.responses import ListSerializer
+from app.dependencies import get_db, admin_required, catalog_validators
+from app.negotiation import NegotiatedRoute
 from db import models
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
+publisher_list = ListSerializer(Publisher)
 
 # ------------------------------------
 # Endpoints for Publishers
@@ -21,33 +28,47 @@ async def create_publisher_endpoint(
     current_user: models.User = Depends(admin_required),
 ) -> Publisher:
     """Create a new publisher."""
-    return create_publisher(db=db, publisher=publisher)
+    return await create_publisher(db=db, publisher=publisher)
 
 
-@router.get("/publishers/", response_model=list[Publisher])
+@router.get(
+    "/publishers/",
+    response_model=list[Publisher],
+    dependencies=[Depends(catalog_validators("publishers"))],
+)
 async def get_publishers_endpoint(
+    response: Response,
     offset: int = 0,
     limit: int = 10,
     sort_by: str = "name",
     sort_order: Literal["asc", "desc"] = "asc",
     db: Session = Depends(get_db),
-) -> list[Publisher]:
+    cursor: Optional[str] = None,
+) -> Response:
     """Retrieve a list of publishers with pagination."""
-    return get_publishers(
+    page = await get_publisher_rows(
         db=db,
         offset=offset,
         limit=limit,
         sort_by=sort_by,
         sort_order=sort_order,
+        cursor=cursor,
     )
+    return publisher_list.response(response, page)
 
 
-@router.get("/publishers/{publisher_id}", response_model=Publisher)
+@router.get(
+    "/publishers/{publisher_id}",
+    response_model=Publisher,
+    dependencies=[
+        Depends(catalog_validators("publishers", resource=get_publisher))
+    ],
+)
 async def get_publisher_endpoint(
     publisher_id: int, db: Session = Depends(get_db)
 ) -> Publisher:
     """Retrieve a publisher by its ID."""
-    db_publisher = get_publisher(db=db, publisher_id=publisher_id)
+    db_publisher = await get_publisher(db=db, publisher_id=publisher_id)
     if db_publisher is None:
         raise HTTPException(status_code=404, detail="Publisher not found")
     return db_publisher
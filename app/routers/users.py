@@ -1,17 +1,25 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
-from app.schemas import BorrowingHistory, User, BookBase
-from app.crud import (
+from app.schemas import BorrowingHistory, Debtor, User, BookBase
+from app.async_crud import (
     get_user_borrowing_history,
     get_active_borrowing_book,
-    get_users,
-    get_debtors,
+    get_user_rows,
+    get_debtor_rows,
 )
+from app.pagination import with_next_cursor
+from app.responses import ListSerializer
 from app.dependencies import get_db, admin_required, get_current_user
+from app.negotiation import NegotiatedRoute
 from db import models
 from db.models import Book
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
+user_list = ListSerializer(User)
+debtor_list = ListSerializer(Debtor)
 
 
 # ------------------------------------
@@ -19,11 +27,30 @@ router = APIRouter()
 # ------------------------------------
 @router.get("/me/history", response_model=list[BorrowingHistory])
 async def get_borrowing_history_endpoint(
+    response: Response,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
+    offset: int = 0,
+    limit: int = 10,
+    sort_order: Literal["asc", "desc"] = "desc",
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    active_only: bool = False,
 ) -> list[BorrowingHistory]:
-    """Retrieve borrowing history for current user."""
-    return get_user_borrowing_history(db=db, user_id=current_user.id)
+    """Retrieve borrowing history for current user, newest first."""
+    page = await get_user_borrowing_history(
+        db=db,
+        user_id=current_user.id,
+        offset=offset,
+        limit=limit,
+        sort_order=sort_order,
+        cursor=cursor,
+        date_from=date_from,
+        date_to=date_to,
+        active_only=active_only,
+    )
+    return with_next_cursor(response, page)
 
 
 @router.get("/me/debts", response_model=list[BookBase])
@@ -32,26 +59,30 @@ async def get_current_user_active_borrowings_endpoint(
     current_user: models.User = Depends(get_current_user),
 ) -> list[Book]:
     """Retrieve active borrowing books for current user."""
-    return get_active_borrowing_book(db=db, user_id=current_user.id)
+    return await get_active_borrowing_book(db=db, user_id=current_user.id)
 
 
 @router.get("/users", response_model=list[User])
 async def get_users_endpoint(
+    response: Response,
     db: Session = Depends(get_db),
     offset: int = 0,
     limit: int = 10,
     sort_by: str = "email",
     sort_order: str = "asc",
     current_user: models.User = Depends(admin_required),
-) -> list[User]:
+    cursor: Optional[str] = None,
+) -> Response:
     """Retrieve a list of users."""
-    return get_users(
+    page = await get_user_rows(
         db=db,
         offset=offset,
         limit=limit,
         sort_by=sort_by,
         sort_order=sort_order,
+        cursor=cursor,
     )
+    return user_list.response(response, page)
 
 
 @router.get("/users/{user_id}/debts", response_model=list[BookBase])
@@ -61,33 +92,60 @@ async def get_user_active_borrowings_endpoint(
     current_user: models.User = Depends(admin_required),
 ) -> list[Book]:
     """Retrieve active borrowing books for current user."""
-    return get_active_borrowing_book(db=db, user_id=user_id)
+    return await get_active_borrowing_book(db=db, user_id=user_id)
 
 
 @router.get("/users/{user_id}/history", response_model=list[BorrowingHistory])
 async def get_user_borrowing_history_endpoint(
+    response: Response,
     user_id: int,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(admin_required),
+    offset: int = 0,
+    limit: int = 10,
+    sort_order: Literal["asc", "desc"] = "desc",
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    active_only: bool = False,
 ) -> list[BorrowingHistory]:
-    """Retrieve borrowing history for a specific book."""
-    return get_user_borrowing_history(db=db, user_id=user_id)
+    """Retrieve borrowing history for a specific user, newest first."""
+    page = await get_user_borrowing_history(
+        db=db,
+        user_id=user_id,
+        offset=offset,
+        limit=limit,
+        sort_order=sort_order,
+        cursor=cursor,
+        date_from=date_from,
+        date_to=date_to,
+        active_only=active_only,
+    )
+    return with_next_cursor(response, page)
 
 
-@router.get("/debtors", response_model=list[User])
+@router.get("/debtors", response_model=list[Debtor])
 async def get_debtors_endpoint(
+    response: Response,
     db: Session = Depends(get_db),
     limit: int = 10,
     offset: int = 0,
-    sort_by: str = None,
-    sort_order: str = None,
+    sort_by: Optional[
+        Literal["email", "active_loans", "oldest_loan_date"]
+    ] = None,
+    sort_order: Literal["asc", "desc"] = "asc",
     current_user: models.User = Depends(admin_required),
-) -> list[User]:
-    """Retrieve a list of debtors."""
-    return get_debtors(
+    cursor: Optional[str] = None,
+) -> Response:
+    """Retrieve the users with active loans, with their loan count and
+    oldest borrow date. Sortable by email, active_loans and
+    oldest_loan_date."""
+    page = await get_debtor_rows(
         db=db,
         offset=offset,
         limit=limit,
         sort_by=sort_by,
         sort_order=sort_order,
+        cursor=cursor,
     )
+    return debtor_list.response(response, page)
@@ -22,6 +22,13 @@ class User(BaseModel):
         orm_mode = True
 
 
+class Debtor(User):
+    """A user with active loans, as listed by /debtors."""
+
+    active_loans: int
+    oldest_loan_date: date
+
+
 # ------------------------------------
 # Pydantic models for Books
 # ------------------------------------
@@ -49,6 +56,17 @@ class Book(BookBase):
         orm_mode = True
 
 
+class BookImportError(BaseModel):
+    row: int  # 1-based position of the record in the input
+    detail: str
+
+
+class BookImportReport(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: list[BookImportError] = []  # At most IMPORT_MAX_ERRORS
+
+
 # ------------------------------------
 # Pydantic models for Authors
 # ------------------------------------
@@ -132,6 +150,7 @@ class BorrowingHistoryBase(BaseModel):
     book_id: int
     user: "User"
     borrow_date: condate(le=date.today())
+    due_date: date | None = None
     return_date: condate(le=date.today()) | None = None
 
 
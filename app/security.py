@@ -1,14 +1,141 @@
-from passlib.context import CryptContext
+import asyncio
+import os
+import time
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from functools import cache
+from threading import Lock
+from typing import Any, Callable
 
-# Context for hashing passwords
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from decouple import config
+from fastapi import HTTPException
+
+
+@cache
+def pwd_context():
+    """Context for hashing passwords, created on first use so that
+    importing the app does not import passlib."""
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+# bcrypt runs on its own executor, so that login bursts cannot occupy the
+# threadpool shared with the database-bound dependencies and handlers.
+# PASSWORD_HASH_EXECUTOR is "thread" or "process".
+PASSWORD_HASH_EXECUTOR = config("PASSWORD_HASH_EXECUTOR", default="thread")
+PASSWORD_HASH_WORKERS = config(
+    "PASSWORD_HASH_WORKERS", default=min(4, os.cpu_count() or 1), cast=int
+)
+# Hashes allowed to wait for a worker before requests are rejected
+PASSWORD_HASH_QUEUE_LIMIT = config(
+    "PASSWORD_HASH_QUEUE_LIMIT", default=32, cast=int
+)
 
 
 def hash_password(password: str) -> str:
     """Returns the hashed password."""
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Compares the provided password with the hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
+
+
+class HashingPool:
+    """A bounded executor for password hashing.
+
+    At most workers + queue_limit calls are admitted at once, further
+    calls fail fast with 503 instead of queueing without bound."""
+
+    def __init__(self, kind: str, workers: int, queue_limit: int):
+        self.kind = kind
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = None
+        self._lock = Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        # Created on first use, so importing the app spawns no processes
+        if self._executor is None:
+            executor_class = (
+                ProcessPoolExecutor
+                if self.kind == "process"
+                else ThreadPoolExecutor
+            )
+            self._executor = executor_class(max_workers=self.workers)
+        return self._executor
+
+    async def run(self, func: Callable, *args) -> Any:
+        """Run func on the pool, or raise 503 if the queue is full."""
+        with self._lock:
+            if self.pending >= self.workers + self.queue_limit:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many concurrent logins, retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            latency = time.perf_counter() - start
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+
+    def stats(self) -> dict:
+        """Queue depth, rejections and hash latency of the pool."""
+        with self._lock:
+            return {
+                "executor": self.kind,
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "in_flight": min(self.pending, self.workers),
+                "queue_depth": max(0, self.pending - self.workers),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_latency_ms": (
+                    self.total_latency / self.completed * 1000
+                    if self.completed
+                    else 0.0
+                ),
+                "max_latency_ms": self.max_latency * 1000,
+            }
+
+
+hashing_pool = HashingPool(
+    kind=PASSWORD_HASH_EXECUTOR,
+    workers=PASSWORD_HASH_WORKERS,
+    queue_limit=PASSWORD_HASH_QUEUE_LIMIT,
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hashes a password on the dedicated hashing pool."""
+    return await hashing_pool.run(hash_password, password)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> bool:
+    """Verifies a password on the dedicated hashing pool."""
+    return await hashing_pool.run(
+        verify_password, plain_password, hashed_password
+    )
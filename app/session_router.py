@@ -0,0 +1,98 @@
+from itertools import cycle
+from math import ceil
+from threading import Lock
+from time import time
+from typing import Callable, Optional, Sequence
+
+from decouple import config
+from fastapi import Request, Response
+from jose import JWTError
+
+from app.cache import TTLCache
+from app.jwt_handler import decode_token
+
+# After a write, a user's reads go to the primary for this many seconds,
+# so that they see their own borrowings before the replicas catch up.
+READ_YOUR_WRITES_SECONDS = config(
+    "READ_YOUR_WRITES_SECONDS", default=5, cast=float
+)
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Cookie carrying the time of the client's last write, so that any worker
+# pins its reads, including after unauthenticated writes such as /register
+LAST_WRITE_COOKIE = "last_write"
+
+
+def token_subject(request: Request) -> Optional[str]:
+    """The user a request is authenticated as, None without a valid
+    bearer token."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_token(token).get("sub")
+    except JWTError:
+        return None
+
+
+def last_write(request: Request) -> Optional[float]:
+    """The time of the client's last write, from its cookie."""
+    try:
+        return float(request.cookies[LAST_WRITE_COOKIE])
+    except (KeyError, ValueError):
+        return None
+
+
+async def pin_writers_to_primary(request: Request, call_next) -> Response:
+    """Middleware setting the last write cookie on responses to writes."""
+    response = await call_next(request)
+    if request.method not in READ_METHODS:
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            str(time()),
+            max_age=ceil(READ_YOUR_WRITES_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
+class SessionRouter:
+    """Picks the session factory of a request: a replica, in turn, for
+    reads and the primary for writes and for clients who recently wrote.
+
+    A client is recognized by the last write cookie that
+    pin_writers_to_primary sets, or by its token for clients that do not
+    keep cookies, in which case only the process that took the write
+    knows about it. Without replicas every request gets the primary."""
+
+    def __init__(
+        self,
+        primary: Callable,
+        replicas: Sequence[Callable] = (),
+        sticky_seconds: float = READ_YOUR_WRITES_SECONDS,
+    ):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.sticky_seconds = sticky_seconds
+        self._next_replica = cycle(self.replicas)
+        self._lock = Lock()
+        self.recent_writers = TTLCache(maxsize=65536, ttl=sticky_seconds)
+
+    def session_factory(self, request: Request) -> Callable:
+        """The session factory to open the request's session with."""
+        if not self.replicas:
+            return self.primary
+        user = token_subject(request)
+        if request.method not in READ_METHODS:
+            if user is not None:
+                self.recent_writers.set(user, True)
+            return self.primary
+        if user is not None and self.recent_writers.get(user):
+            return self.primary
+        written = last_write(request)
+        if written is not None and time() - written < self.sticky_seconds:
+            return self.primary
+        with self._lock:
+            return next(self._next_replica)
@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+
+from decouple import config
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.cache import TTLCache
+from db import models
+
+# Authenticated users are cached by token subject (email) for up to
+# USER_CACHE_TTL seconds, USER_CACHE_TTL=0 disables the cache. A change to
+# a user only invalidates the cache of the process that made it, so other
+# workers may see the old admin flag or loan limit for up to that long.
+USER_CACHE_SIZE = config("USER_CACHE_SIZE", default=1024, cast=int)
+USER_CACHE_TTL = config("USER_CACHE_TTL", default=5, cast=float)
+
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Session-independent snapshot of the user behind a token."""
+
+    id: int
+    email: str
+    is_admin: bool
+    max_books: int
+
+    @classmethod
+    def from_model(cls, user: models.User) -> "AuthenticatedUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            is_admin=bool(user.is_admin),
+            max_books=user.max_books,
+        )
+
+
+# ------------------------------------
+# Invalidation
+# ------------------------------------
+#
+# Changed or deleted users are collected per session and dropped from this
+# process's cache once the transaction commits, so a concurrent request
+# cannot cache the row again between the flush and the commit. Other
+# processes keep their entries until USER_CACHE_TTL expires them.
+
+
+def _stale_emails(session: Session) -> set:
+    return session.info.setdefault("stale_user_emails", set())
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _mark_user_stale(mapper, connection, target: models.User) -> None:
+    session = object_session(target)
+    if session is None:
+        return
+    emails = _stale_emails(session)
+    emails.add(target.email)
+    # A changed email must also drop the entry cached under the old one
+    emails.update(inspect(target).attrs.email.history.deleted or ())
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_stale_users(session: Session) -> None:
+    for email in session.info.pop("stale_user_emails", ()):
+        user_cache.invalidate(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_users(session: Session) -> None:
+    session.info.pop("stale_user_emails", None)
@@ -0,0 +1,75 @@
+"""Compare the time to serialize a 100-row /books/ page, with nested
+authors and genres, with the stdlib JSONResponse and with ORJSONResponse.
+
+Each path starts from the page as response models:
+
+- jsonable_encoder: what FastAPI does for routes without a response model
+- response_model: the JSON-mode dump FastAPI makes of a response model,
+  then the response class renders it
+- python mode: dates and ISBNs left for the encoder to handle
+- ListSerializer: the TypeAdapter writing JSON itself, as /books/ does
+
+Run with: python -m benchmarks.bench_json_response
+"""
+
+from benchmarks.common import make_database, report, timeit
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import crud, schemas  # noqa: E402
+from app.responses import ListSerializer, ORJSONResponse  # noqa: E402
+
+DATABASE_URL = "sqlite:///./bench_json_response.db"
+PAGE_SIZE = 100
+REPEAT = 2000
+
+
+def main() -> None:
+    engine = make_database(DATABASE_URL, books=1000)
+    with sessionmaker(bind=engine)() as db:
+        rows = crud.get_book_rows(db, limit=PAGE_SIZE)
+    serializer = ListSerializer(schemas.Book)
+    adapter = serializer.adapter
+    page = adapter.validate_python(rows)
+    content = adapter.dump_python(page, mode="json")
+
+    paths = [
+        (
+            "JSONResponse, jsonable_encoder",
+            lambda: JSONResponse(jsonable_encoder(page)).body,
+        ),
+        (
+            "JSONResponse, response_model",
+            lambda: JSONResponse(adapter.dump_python(page, mode="json")).body,
+        ),
+        (
+            "ORJSONResponse, response_model",
+            lambda: ORJSONResponse(
+                adapter.dump_python(page, mode="json")
+            ).body,
+        ),
+        (
+            "ORJSONResponse, python mode",
+            lambda: ORJSONResponse(adapter.dump_python(page)).body,
+        ),
+        ("ListSerializer", lambda: adapter.dump_json(page)),
+    ]
+    report(
+        f"Serialize a page of {PAGE_SIZE} books, mean of {REPEAT}",
+        [(name, timeit(serve, REPEAT)) for name, serve in paths],
+        "us",
+    )
+    report(
+        "Rendering only, from the same JSON-mode dump",
+        [
+            ("JSONResponse", timeit(lambda: JSONResponse(content).body)),
+            ("ORJSONResponse", timeit(lambda: ORJSONResponse(content).body)),
+        ],
+        "us",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Compare the payload size and the encode and decode time of list pages
+in JSON and in MessagePack.
+
+Pages of books (with nested authors and genres), authors and loans are
+encoded the way ListSerializer writes them for each Accept header, then
+decoded the way a client would: with the stdlib json module, with orjson
+and with msgpack.
+
+Run with: python -m benchmarks.bench_msgpack
+"""
+
+import json
+import os
+from datetime import date, timedelta
+
+# Measure the encoders, not the result cache
+os.environ["RESULT_CACHE_BACKEND"] = "none"
+
+from benchmarks.common import make_database, report, timeit  # noqa: E402
+
+import msgpack  # noqa: E402
+import orjson  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import crud, schemas  # noqa: E402
+from app.responses import ListSerializer, packb  # noqa: E402
+
+DATABASE_URL = "sqlite:///./bench_msgpack.db"
+PAGE_SIZE = 100
+REPEAT = 2000
+
+
+def loan_rows() -> list[dict]:
+    borrowed = date.today() - timedelta(days=30)
+    return [
+        {
+            "id": i,
+            "book_id": i % 50 + 1,
+            "user": {
+                "id": i % 20 + 1,
+                "email": f"reader{i % 20}@example.com",
+                "is_admin": False,
+            },
+            "borrow_date": borrowed,
+            "due_date": borrowed + timedelta(days=14),
+            "return_date": None if i % 3 else borrowed + timedelta(days=7),
+        }
+        for i in range(1, PAGE_SIZE + 1)
+    ]
+
+
+def measure(name: str, schema, rows) -> tuple[list, list, list]:
+    adapter = ListSerializer(schema).adapter
+    page = adapter.validate_python(rows)
+    as_json = adapter.dump_json(page)
+    as_msgpack = packb(adapter.dump_python(page, mode="json"))
+    assert msgpack.unpackb(as_msgpack) == json.loads(as_json)
+
+    sizes = [
+        (f"{name} JSON", len(as_json) / 1024),
+        (f"{name} msgpack", len(as_msgpack) / 1024),
+    ]
+    encode = [
+        (f"{name} JSON", timeit(lambda: adapter.dump_json(page), REPEAT)),
+        (
+            f"{name} msgpack",
+            timeit(
+                lambda: packb(adapter.dump_python(page, mode="json")), REPEAT
+            ),
+        ),
+    ]
+    decode = [
+        (f"{name} json", timeit(lambda: json.loads(as_json), REPEAT)),
+        (f"{name} orjson", timeit(lambda: orjson.loads(as_json), REPEAT)),
+        (
+            f"{name} msgpack",
+            timeit(lambda: msgpack.unpackb(as_msgpack), REPEAT),
+        ),
+    ]
+    return sizes, encode, decode
+
+
+def main() -> None:
+    engine = make_database(DATABASE_URL, books=1000, authors=1000)
+    with sessionmaker(bind=engine)() as db:
+        books = crud.get_book_rows(db, limit=PAGE_SIZE)
+        authors = crud.get_author_rows(db, limit=PAGE_SIZE)
+    results = [
+        measure("books", schemas.Book, books),
+        measure("authors", schemas.Author, authors),
+        measure("loans", schemas.BorrowingHistory, loan_rows()),
+    ]
+    report(
+        f"Payload of a page of {PAGE_SIZE}",
+        [row for sizes, _, _ in results for row in sizes],
+        "KiB",
+    )
+    report(
+        f"Encode a page, mean of {REPEAT}",
+        [row for _, encode, _ in results for row in encode],
+        "us",
+    )
+    report(
+        f"Decode a page, mean of {REPEAT}",
+        [row for _, _, decode in results for row in decode],
+        "us",
+    )
+
+
+if __name__ == "__main__":
+    main()
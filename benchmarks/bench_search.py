@@ -0,0 +1,90 @@
+"""Latency of /books/search queries on a catalog of a million books.
+
+Run with: python -m benchmarks.bench_search
+"""
+
+import random
+import time
+
+from benchmarks.common import make_database, report
+
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import crud  # noqa: E402
+
+DATABASE_URL = "sqlite:///./bench_search.db"
+BOOKS = 1_000_000
+AUTHORS = 20_000
+REPEAT = 200
+# Every match ranked, then only the newest thousand
+WINDOWS = (0, 1000)
+
+# Titles of two to five words drawn from a vocabulary of synthetic words
+SYLLABLES = ["ka", "lo", "mi", "ner", "sa", "tor", "vi", "zu", "an", "el"]
+VOCABULARY = [
+    a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES
+]
+
+
+def make_title(i: int) -> str:
+    words = random.Random(i).choices(VOCABULARY, k=2 + i % 4)
+    return " ".join(words).capitalize()
+
+
+def make_author(i: int) -> str:
+    # Unique for fewer than a million authors, 37 is coprime with 1000
+    first = VOCABULARY[i % 1000]
+    last = VOCABULARY[(i // 1000 * 37 + i) % 1000]
+    return f"{first} {last}".title()
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main() -> None:
+    start = time.perf_counter()
+    engine = make_database(
+        DATABASE_URL,
+        books=BOOKS,
+        authors=AUTHORS,
+        title=make_title,
+        author=make_author,
+    )
+    print(f"Seeded {BOOKS} books in {time.perf_counter() - start:.0f}s")
+
+    # Bypass the result cache, every call runs the query
+    search_books = crud.search_books.__wrapped__
+    rng = random.Random(0)
+    queries = {
+        "one word": lambda: rng.choice(VOCABULARY),
+        "two words": lambda: " ".join(rng.choices(VOCABULARY, k=2)),
+        "4-letter prefix": lambda: rng.choice(VOCABULARY)[:4],
+        "author name": lambda: make_author(rng.randrange(AUTHORS)),
+    }
+
+    with Session(engine) as db:
+        for window in WINDOWS:
+            crud.SEARCH_RANK_WINDOW = window
+            rows = []
+            for name, make_query in queries.items():
+                samples = []
+                for _ in range(REPEAT):
+                    q = make_query()
+                    started = time.perf_counter()
+                    search_books(db, q=q, limit=20)
+                    samples.append((time.perf_counter() - started) * 1000)
+                    db.expunge_all()
+                rows.append((f"{name} p50", percentile(samples, 0.5)))
+                rows.append((f"{name} p99", percentile(samples, 0.99)))
+            report(
+                f"search_books over {BOOKS} books, limit=20, "
+                f"SEARCH_RANK_WINDOW={window}",
+                rows,
+                "ms",
+            )
+
+
+if __name__ == "__main__":
+    main()
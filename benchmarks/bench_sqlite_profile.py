@@ -0,0 +1,106 @@
+"""Compare concurrent reads and writes on SQLite with the default rollback
+journal and with the SQLITE_PERFORMANCE_PROFILE pragmas.
+
+Reader threads page through /books/-like queries while one writer
+commits borrow-like transactions, each a book update and a loan insert.
+
+Run with: python -m benchmarks.bench_sqlite_profile
+"""
+
+import threading
+import time
+from datetime import date
+
+from benchmarks.common import make_database, report
+
+from sqlalchemy import create_engine, insert, select, update  # noqa: E402
+
+from db import models  # noqa: E402
+from db.engine import engine_options, use_sqlite_pragmas  # noqa: E402
+
+DATABASE_URL = "sqlite:///./bench_sqlite_profile.db"
+READERS = 4
+DURATION = 5.0
+
+
+def run(profile: bool) -> list[tuple[str, float]]:
+    make_database(DATABASE_URL, books=20_000).dispose()
+    engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+    if profile:
+        use_sqlite_pragmas(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(models.User),
+            [{"email": "bench@example.com", "hashed_password": "-"}],
+        )
+
+    deadline = time.perf_counter() + DURATION
+    reads = [0] * READERS
+    worst_read = [0.0] * READERS
+    writes = 0
+
+    def reader(n: int) -> None:
+        page = (
+            select(models.Book.id, models.Book.title)
+            .order_by(models.Book.id)
+            .limit(20)
+        )
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            with engine.connect() as connection:
+                offset = reads[n] * 20 % 19_980
+                connection.execute(page.offset(offset)).all()
+            worst_read[n] = max(worst_read[n], time.perf_counter() - start)
+            reads[n] += 1
+
+    def writer() -> None:
+        nonlocal writes
+        while time.perf_counter() < deadline:
+            book_id = writes % 20_000 + 1
+            with engine.begin() as connection:
+                connection.execute(
+                    update(models.Book)
+                    .where(models.Book.id == book_id)
+                    .values(available_copies=models.Book.available_copies - 1)
+                )
+                connection.execute(
+                    insert(models.BorrowingHistory).values(
+                        book_id=book_id, user_id=1, borrow_date=date.today()
+                    )
+                )
+            writes += 1
+
+    threads = [
+        threading.Thread(target=reader, args=(n,)) for n in range(READERS)
+    ]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    name = "profile" if profile else "default"
+    return [
+        (f"{name} reads", sum(reads) / DURATION),
+        (f"{name} writes", writes / DURATION),
+        (f"{name} worst read", max(worst_read) * 1000),
+    ]
+
+
+def main() -> None:
+    default, profile = run(profile=False), run(profile=True)
+    report(
+        f"{READERS} readers and 1 writer for {DURATION:.0f}s, per second",
+        [row for row in default + profile if "worst" not in row[0]],
+        "/s",
+    )
+    report(
+        "Slowest read",
+        [row for row in default + profile if "worst" in row[0]],
+        "ms",
+    )
+
+
+if __name__ == "__main__":
+    main()
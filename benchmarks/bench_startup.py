@@ -0,0 +1,132 @@
+"""Report what a worker spends before it can serve its first request.
+
+Each measurement runs in a fresh interpreter, as a uvicorn worker does:
+
+- the import cost of app.main and of the heavier packages it pulls in,
+  from python -X importtime
+- the cost of the imports deferred to first use (jose.jwt when a token is
+  signed or verified, passlib when a password is hashed)
+- the lifespan with and without CREATE_TABLES_ON_STARTUP, against a
+  database whose tables already exist
+
+Run with: python -m benchmarks.bench_startup
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import make_database, report
+
+DATABASE_URL = "sqlite:///./bench_startup.db"
+RUNS = 5
+
+# Cumulative import time of these modules within the import of app.main
+MODULES = (
+    "app.main",
+    "fastapi",
+    "sqlalchemy",
+    "email_validator",
+    "pydantic_extra_types.isbn",
+    "jose",
+    "orjson",
+    "msgpack",
+)
+
+# Statements run on first use, after app.main is imported
+DEFERRED = {
+    "jose.jwt": "import jose.jwt",
+    "passlib CryptContext": (
+        "from app.security import pwd_context; pwd_context()"
+    ),
+}
+
+STARTUP = """
+import asyncio, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def startup():
+    async with app.router.lifespan_context(app):
+        pass
+
+asyncio.run(startup())
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def python(
+    code: str, *options: str, **env: str
+) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *options, "-W", "ignore", "-c", code],
+        env={**os.environ, "DATABASE_URL": DATABASE_URL, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_times() -> dict[str, float]:
+    """Median cumulative import time of MODULES, in ms."""
+    samples = {name: [] for name in MODULES}
+    for _ in range(RUNS):
+        stderr = python("import app.main", "-X", "importtime").stderr
+        for line in stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            _, cumulative, name = line.split("|")
+            if name.strip() in samples:
+                samples[name.strip()].append(int(cumulative) / 1000)
+    return {
+        name: statistics.median(times) if times else 0.0
+        for name, times in samples.items()
+    }
+
+
+def deferred_time(statement: str) -> float:
+    """Median time of statement after importing app.main, in ms."""
+    code = (
+        "import time, app.main; start = time.perf_counter(); "
+        f"{statement}; print((time.perf_counter() - start) * 1000)"
+    )
+    return statistics.median(float(python(code).stdout) for _ in range(RUNS))
+
+
+def startup_times(create_tables: bool) -> tuple[float, float]:
+    """Median import and lifespan time of the app, in ms."""
+    runs = [
+        python(STARTUP, CREATE_TABLES_ON_STARTUP=str(create_tables)).stdout
+        for _ in range(RUNS)
+    ]
+    imports, lifespans = zip(*(map(float, run.split()) for run in runs))
+    return (
+        statistics.median(imports) * 1000,
+        statistics.median(lifespans) * 1000,
+    )
+
+
+def main() -> None:
+    make_database(DATABASE_URL, books=100).dispose()
+    report(
+        f"Import time within app.main, median of {RUNS}",
+        list(import_times().items()),
+        "ms",
+    )
+    report(
+        "Deferred to first use",
+        [(name, deferred_time(code)) for name, code in DEFERRED.items()],
+        "ms",
+    )
+    rows = []
+    for create_tables in (True, False):
+        imports, lifespan = startup_times(create_tables)
+        name = f"CREATE_TABLES_ON_STARTUP={create_tables}"
+        rows += [(f"{name} import", imports), (f"{name} lifespan", lifespan)]
+    report("Worker startup", rows, "ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Per-request cost of verify_token with and without the token cache.
+
+Run with: python -m benchmarks.bench_token_cache
+"""
+
+from benchmarks.common import report, timeit
+
+from fastapi import HTTPException  # noqa: E402
+
+from app import jwt_handler  # noqa: E402
+
+REPEAT = 20_000
+
+
+def main() -> None:
+    token = jwt_handler.create_access_token(data={"sub": "a@example.com"})
+    error = HTTPException(status_code=403)
+
+    def uncached():
+        jwt_handler.token_cache.clear()
+        jwt_handler.verify_token(token, error)
+
+    def cached():
+        jwt_handler.verify_token(token, error)
+
+    rows = [
+        ("jwt.decode every request", timeit(uncached, REPEAT)),
+        ("verified-token cache hit", timeit(cached, REPEAT)),
+    ]
+    report(f"verify_token x{REPEAT}", rows, "us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import time
+from datetime import date
+from typing import Awaitable, Callable, Optional
+
+# The app reads its settings at import time
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+from db import models  # noqa: E402
+from db.engine import Base  # noqa: E402
+
+
+def make_database(
+    url: str,
+    books: int = 1000,
+    authors: int = 100,
+    batch: int = 10_000,
+    title: Optional[Callable[[int], str]] = None,
+    author: Optional[Callable[[int], str]] = None,
+) -> Engine:
+    """Create a fresh database at url seeded with a synthetic catalog.
+
+    title and author map an index to a book title or a unique author name,
+    "Book 00000042" and "Author 42" by default."""
+    title = title or (lambda i: f"Book {i:08d}")
+    author = author or (lambda i: f"Author {i}")
+    if url.startswith("sqlite:///"):
+        path = url.removeprefix("sqlite:///")
+        if os.path.exists(path):
+            os.remove(path)
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as connection:
+        connection.execute(
+            insert(models.Author),
+            [
+                {"name": author(i), "birthdate": date(1950, 1, 1)}
+                for i in range(authors)
+            ],
+        )
+        connection.execute(
+            insert(models.Genre),
+            [{"name": f"Genre {i}"} for i in range(10)],
+        )
+        connection.execute(
+            insert(models.Publisher),
+            [
+                {"name": f"Publisher {i}", "established_year": 1950}
+                for i in range(10)
+            ],
+        )
+        for start in range(0, books, batch):
+            connection.execute(
+                insert(models.Book),
+                [
+                    {
+                        "title": title(i),
+                        "isbn": "9783161484100",
+                        "publish_date": date(2000, 1, 1),
+                        "number_of_copies": 5,
+                        "author_id": i % authors + 1,
+                        "genre_id": i % 10 + 1,
+                        "publisher_id": i % 10 + 1,
+                    }
+                    for i in range(start, min(start + batch, books))
+                ],
+            )
+    return engine
+
+
+def timeit(func: Callable, repeat: int = 1000) -> float:
+    """Return the mean wall time of func in microseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+async def throughput(
+    call: Callable[[], Awaitable], total: int, concurrency: int
+) -> float:
+    """Run call total times with the given concurrency, return calls/s."""
+    queue = iter(range(total))
+
+    async def worker():
+        for _ in queue:
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - start)
+
+
+def report(title: str, rows: list[tuple[str, float]], unit: str) -> None:
+    """Print a small aligned results table."""
+    print(title)
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f"  {name:<{width}}  {value:12.1f} {unit}")
@@ -1,11 +1,234 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from decouple import config
+from decouple import Csv, config
+
+from db.pool import TimedAsyncQueuePool, TimedQueuePool
 
 DATABASE_URL = config("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Read-only copies of the database. When set, GET requests are served
+# from them in turn and the primary only takes writes.
+REPLICA_DATABASE_URLS = config("REPLICA_DATABASE_URLS", default="", cast=Csv())
+
+# Serve requests through AsyncEngine/AsyncSession instead of the blocking
+# Session. The sync path stays the default.
+USE_ASYNC_DB = config("USE_ASYNC_DB", default=False, cast=bool)
+
+# Opt-in pragmas for SQLite files: WAL lets readers run while a write
+# commits, and synchronous=NORMAL only syncs at checkpoints in WAL mode.
+SQLITE_PERFORMANCE_PROFILE = config(
+    "SQLITE_PERFORMANCE_PROFILE", default=False, cast=bool
+)
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": config("SQLITE_MMAP_SIZE", default=256 * 1024**2, cast=int),
+    # Negative sizes are in KiB
+    "cache_size": config("SQLITE_CACHE_SIZE", default=-64 * 1024, cast=int),
+    "temp_store": "MEMORY",
+    "busy_timeout": config("SQLITE_BUSY_TIMEOUT", default=5000, cast=int),
+}
+
+# Async drivers used when ASYNC_DATABASE_URL is not set explicitly
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Translate a sync database URL to its async driver counterpart."""
+    sync_url = make_url(url)
+    backend = sync_url.get_backend_name()
+    if sync_url.drivername != backend or backend not in ASYNC_DRIVERS:
+        return url
+    return sync_url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(
+        hide_password=False
+    )
+
+
+# Pool settings by backend, each one can be overridden with the DB_POOL_*
+# variable of the same name. Network databases drop idle connections, so
+# their connections are recycled and pinged before use.
+POOL_DEFAULTS = {
+    "sqlite": {"pool_recycle": -1, "pool_pre_ping": False},
+    "postgresql": {"pool_recycle": 1800, "pool_pre_ping": True},
+    "mysql": {"pool_recycle": 3600, "pool_pre_ping": True},
+}
+POOL_GENERIC_DEFAULTS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 30,
+    "pool_recycle": 1800,
+    "pool_pre_ping": True,
+}
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """create_engine keyword arguments for a database URL: its driver's
+    connect_args and a pool configured from DB_POOL_* settings."""
+    database_url = make_url(url)
+    backend = database_url.get_backend_name()
+    options = {}
+    if backend == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if database_url.database in (None, "", ":memory:"):
+            # In-memory databases live in a single connection, keep
+            # SQLAlchemy's default pool for them
+            return options
+
+    defaults = {**POOL_GENERIC_DEFAULTS, **POOL_DEFAULTS.get(backend, {})}
+    options.update(
+        poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+        pool_size=config(
+            "DB_POOL_SIZE", default=defaults["pool_size"], cast=int
+        ),
+        max_overflow=config(
+            "DB_POOL_MAX_OVERFLOW", default=defaults["max_overflow"], cast=int
+        ),
+        pool_timeout=config(
+            "DB_POOL_TIMEOUT", default=defaults["pool_timeout"], cast=float
+        ),
+        pool_recycle=config(
+            "DB_POOL_RECYCLE", default=defaults["pool_recycle"], cast=int
+        ),
+        pool_pre_ping=config(
+            "DB_POOL_PRE_PING", default=defaults["pool_pre_ping"], cast=bool
+        ),
+    )
+    return options
+
+
+def use_sqlite_pragmas(engine: Engine, pragmas: dict = SQLITE_PRAGMAS) -> None:
+    """Set the pragmas on every new connection of a SQLite engine."""
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+# Statements making every transaction of a connection read-only. SQLite
+# files are opened read-only instead, see read_only_url.
+READ_ONLY_STATEMENTS = {
+    "postgresql": "SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY",
+    "mysql": "SET SESSION TRANSACTION READ ONLY",
+}
+
+# The journal mode belongs to the database file, only its writer sets it
+READ_ONLY_SQLITE_PRAGMAS = {
+    name: value
+    for name, value in SQLITE_PRAGMAS.items()
+    if name != "journal_mode"
+}
+
+
+def read_only_url(url: str) -> str:
+    """url with SQLite files opened in mode=ro, other URLs unchanged."""
+    database_url = make_url(url)
+    database = database_url.database
+    if database_url.get_backend_name() != "sqlite":
+        return url
+    if database in (None, "", ":memory:"):
+        return url
+    if not database.startswith("file:"):
+        database = f"file:{database}"
+    return (
+        database_url.set(database=database)
+        .update_query_dict({"mode": "ro", "uri": "true"})
+        .render_as_string(hide_password=False)
+    )
+
+
+def use_read_only_sessions(engine: Engine) -> None:
+    """Make every transaction on the engine's connections read-only."""
+    statement = READ_ONLY_STATEMENTS.get(engine.dialect.name)
+    if statement is None:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_read_only(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(statement)
+        cursor.close()
+
+
+def make_engine(url: str, read_only: bool = False) -> Engine:
+    """An engine for url with the pool and SQLite profile configured.
+
+    Replicas are opened read-only, so that a write routed to one fails
+    instead of diverging from the primary."""
+    if read_only:
+        url = read_only_url(url)
+    new_engine = create_engine(url, **engine_options(url))
+    if SQLITE_PERFORMANCE_PROFILE and new_engine.dialect.name == "sqlite":
+        use_sqlite_pragmas(
+            new_engine,
+            READ_ONLY_SQLITE_PRAGMAS if read_only else SQLITE_PRAGMAS,
+        )
+    if read_only:
+        use_read_only_sessions(new_engine)
+    return new_engine
+
+
+engine = make_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engines = [
+    make_engine(url, read_only=True) for url in REPLICA_DATABASE_URLS
+]
+ReplicaSessionLocals = [
+    sessionmaker(autocommit=False, autoflush=False, bind=replica)
+    for replica in replica_engines
+]
+
+async_engine = None
+AsyncSessionLocal = None
+async_replica_engines = []
+AsyncReplicaSessionLocals = []
+
+if USE_ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    def make_async_engine(url: str, read_only: bool = False):
+        """The async counterpart of make_engine."""
+        if read_only:
+            url = read_only_url(url)
+        new_engine = create_async_engine(
+            url, **engine_options(url, is_async=True)
+        )
+        if SQLITE_PERFORMANCE_PROFILE and new_engine.dialect.name == "sqlite":
+            use_sqlite_pragmas(
+                new_engine.sync_engine,
+                READ_ONLY_SQLITE_PRAGMAS if read_only else SQLITE_PRAGMAS,
+            )
+        if read_only:
+            use_read_only_sessions(new_engine.sync_engine)
+        return new_engine
+
+    ASYNC_DATABASE_URL = config(
+        "ASYNC_DATABASE_URL", default=get_async_database_url(DATABASE_URL)
+    )
+    async_engine = make_async_engine(ASYNC_DATABASE_URL)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    async_replica_engines = [
+        make_async_engine(get_async_database_url(url), read_only=True)
+        for url in REPLICA_DATABASE_URLS
+    ]
+    AsyncReplicaSessionLocals = [
+        async_sessionmaker(
+            bind=replica, autoflush=False, expire_on_commit=False
+        )
+        for replica in async_replica_engines
+    ]
+
 Base = declarative_base()
@@ -1,4 +1,17 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Date,
+    DateTime,
+    ForeignKey,
+    Boolean,
+    Index,
+    MetaData,
+    Table,
+    event,
+    insert,
+)
 from sqlalchemy.orm import relationship
 from db.engine import Base
 
@@ -12,6 +25,16 @@ class Author(Base):
     # Relationship to Book model
     books = relationship("Book", back_populates="author")
 
+    __table_args__ = (
+        # Pages sorted by birthdate, keyset-paginated by (birthdate, id)
+        Index("ix_authors_birthdate", birthdate, id),
+    )
+
+
+def _default_available_copies(context) -> int:
+    """New books start with every copy available."""
+    return context.get_current_parameters().get("number_of_copies", 1)
+
 
 class Book(Base):
     __tablename__ = "books"
@@ -20,22 +43,35 @@ class Book(Base):
     isbn = Column(String, nullable=False)  # ISBN can repeat
     publish_date = Column(Date, nullable=False)
     number_of_copies = Column(Integer, nullable=False, default=1)
+    # Copies not currently on loan, kept in step by borrow/return
+    available_copies = Column(
+        Integer, nullable=False, default=_default_available_copies
+    )
 
     # Foreign key and relationship with Publisher
-    publisher_id = Column(Integer, ForeignKey("publishers.id"))
+    publisher_id = Column(Integer, ForeignKey("publishers.id"), index=True)
     publisher = relationship("Publisher", back_populates="books")
 
     # Foreign key and relationship with Author
-    author_id = Column(Integer, ForeignKey("authors.id"), nullable=False)
+    author_id = Column(
+        Integer, ForeignKey("authors.id"), nullable=False, index=True
+    )
     author = relationship("Author", back_populates="books")
 
     # Foreign key and relationship with Genre
-    genre_id = Column(Integer, ForeignKey("genres.id"), nullable=False)
+    genre_id = Column(
+        Integer, ForeignKey("genres.id"), nullable=False, index=True
+    )
     genre = relationship("Genre", back_populates="books")
 
     # Relationship to BorrowingHistory model
     borrowings = relationship("BorrowingHistory", back_populates="book")
 
+    __table_args__ = (
+        # Pages sorted by publish date, keyset-paginated by (date, id)
+        Index("ix_books_publish_date", publish_date, id),
+    )
+
 
 class Genre(Base):
     __tablename__ = "genres"
@@ -55,6 +91,11 @@ class Publisher(Base):
     # Relationship to Book model
     books = relationship("Book", back_populates="publisher")
 
+    __table_args__ = (
+        # Pages sorted by year, keyset-paginated by (year, id)
+        Index("ix_publishers_established_year", established_year, id),
+    )
+
 
 class User(Base):
     __tablename__ = "users"
@@ -71,10 +112,35 @@ class User(Base):
     max_books = Column(
         Integer, default=5
     )  # Limit on the number of books the user can borrow
+    # Summary of the active loans, kept in step by borrow_book/return_book
+    active_loans = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    oldest_loan_date = Column(Date, nullable=True)
 
     # Relationship to BorrowingHistory model
     borrowings = relationship("BorrowingHistory", back_populates="user")
 
+    __table_args__ = (
+        # Debtors paged by loan count or by oldest loan
+        Index("ix_users_active_loans", active_loans, id),
+        Index("ix_users_oldest_loan_date", oldest_loan_date, id),
+        # Debtors paged by id or email, on dialects with partial indexes
+        Index(
+            "ix_users_debtors_id",
+            id,
+            sqlite_where=active_loans > 0,
+            postgresql_where=active_loans > 0,
+        ).ddl_if(dialect=("sqlite", "postgresql")),
+        Index(
+            "ix_users_debtors_email",
+            email,
+            id,
+            sqlite_where=active_loans > 0,
+            postgresql_where=active_loans > 0,
+        ).ddl_if(dialect=("sqlite", "postgresql")),
+    )
+
 
 class BorrowingHistory(Base):
     __tablename__ = "borrowing_history"
@@ -82,6 +148,7 @@ class BorrowingHistory(Base):
     book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     borrow_date = Column(Date, nullable=False)
+    due_date = Column(Date, nullable=True)
     return_date = Column(Date, nullable=True)
 
     # Relationship to User model
@@ -89,3 +156,176 @@ class BorrowingHistory(Base):
 
     # Relationship to Book model
     book = relationship("Book", back_populates="borrowings")
+
+    __table_args__ = (
+        # Loans of a book or a user, filtered by return_date
+        Index(
+            "ix_borrowing_history_book_id_return_date", book_id, return_date
+        ),
+        Index(
+            "ix_borrowing_history_user_id_return_date", user_id, return_date
+        ),
+        # Loans of a book or a user, paged by borrow date
+        Index(
+            "ix_borrowing_history_book_id_borrow_date",
+            book_id,
+            borrow_date,
+            id,
+        ),
+        Index(
+            "ix_borrowing_history_user_id_borrow_date",
+            user_id,
+            borrow_date,
+            id,
+        ),
+        # Active loans only, on dialects with partial indexes
+        Index(
+            "ix_borrowing_history_active_book_id",
+            book_id,
+            sqlite_where=return_date.is_(None),
+            postgresql_where=return_date.is_(None),
+        ).ddl_if(dialect=("sqlite", "postgresql")),
+        Index(
+            "ix_borrowing_history_active_user_id",
+            user_id,
+            sqlite_where=return_date.is_(None),
+            postgresql_where=return_date.is_(None),
+        ).ddl_if(dialect=("sqlite", "postgresql")),
+        # Active loans by due date, for the overdue sweep and listing
+        Index(
+            "ix_borrowing_history_active_due_date",
+            due_date,
+            id,
+            sqlite_where=return_date.is_(None),
+            postgresql_where=return_date.is_(None),
+        ).ddl_if(dialect=("sqlite", "postgresql")),
+    )
+
+
+class ArchivedBorrowing(Base):
+    """A returned loan moved out of borrowing_history by the archiver.
+
+    Keeps the id it had in borrowing_history, history reads query both
+    tables as one."""
+
+    __tablename__ = "borrowing_history_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    borrow_date = Column(Date, nullable=False)
+    due_date = Column(Date, nullable=True)
+    return_date = Column(Date, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ix_borrowing_history_archive_book_id_borrow_date",
+            book_id,
+            borrow_date,
+            id,
+        ),
+        Index(
+            "ix_borrowing_history_archive_user_id_borrow_date",
+            user_id,
+            borrow_date,
+            id,
+        ),
+    )
+
+
+class OverdueLoan(Base):
+    """A loan found past its due date by the overdue sweep, with the fine
+    assessed on the last sweep that saw it active.
+
+    Rows outlive the return and the archiving of their loan."""
+
+    __tablename__ = "overdue_loans"
+    loan_id = Column(Integer, primary_key=True, autoincrement=False)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    due_date = Column(Date, nullable=False)
+    days_overdue = Column(Integer, nullable=False)
+    fine = Column(Integer, nullable=False)  # In the smallest currency unit
+    assessed_on = Column(Date, nullable=False)
+
+    __table_args__ = (Index("ix_overdue_loans_user_id", user_id),)
+
+
+class CatalogVersion(Base):
+    """Change counter of a catalog table, bumped on every write to it.
+
+    Used as the validator for conditional GETs of catalog resources. The
+    tags of the result cache are versioned here too, as "tag:<tag>" rows."""
+
+    __tablename__ = "catalog_versions"
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=True)
+
+
+CATALOG_TABLES = ("books", "authors", "genres", "publishers")
+
+
+@event.listens_for(CatalogVersion.__table__, "after_create")
+def _seed_catalog_versions(table, connection, **kw) -> None:
+    """Start every catalog table at version 0."""
+    connection.execute(
+        insert(table),
+        [{"name": name, "version": 0} for name in CATALOG_TABLES],
+    )
+
+
+# ------------------------------------
+# Full-text search over books
+# ------------------------------------
+#
+# On SQLite, book titles and author names are indexed by an FTS5 table
+# whose rowid is the book id. Triggers keep it in step with every write,
+# including bulk inserts that bypass the ORM. It lives outside Base.metadata
+# so that create_all and autogenerate leave it alone.
+
+book_search = Table(
+    "books_fts",
+    MetaData(),
+    Column("rowid", Integer),
+    Column("title", String),
+    Column("author", String),
+    Column("rank"),
+    Column("books_fts", String),
+)
+
+BOOK_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5("
+    "title, author, tokenize = 'unicode61 remove_diacritics 2', "
+    # Prefix indexes for the short prefixes typed into a search box
+    "prefix = '2 3 4')",
+    # Title matches weigh more than author matches
+    "INSERT INTO books_fts(books_fts, rank) "
+    "VALUES ('rank', 'bm25(10.0, 1.0)')",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books "
+    "BEGIN INSERT INTO books_fts(rowid, title, author) VALUES (new.id, "
+    "new.title, (SELECT name FROM authors WHERE id = new.author_id)); END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_update "
+    "AFTER UPDATE OF title, author_id ON books "
+    "BEGIN UPDATE books_fts SET title = new.title, author = ("
+    "SELECT name FROM authors WHERE id = new.author_id) "
+    "WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books "
+    "BEGIN DELETE FROM books_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_author_update "
+    "AFTER UPDATE OF name ON authors "
+    "BEGIN UPDATE books_fts SET author = new.name WHERE rowid IN ("
+    "SELECT id FROM books WHERE author_id = new.id); END",
+)
+
+
+@event.listens_for(Book.__table__, "after_create")
+def _create_book_search(table, connection, **kw) -> None:
+    if connection.dialect.name == "sqlite":
+        for statement in BOOK_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Book.__table__, "after_drop")
+def _drop_book_search(table, connection, **kw) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS books_fts")
@@ -0,0 +1,74 @@
+import time
+from threading import Lock
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class TimedPoolMixin:
+    """Records how long checkouts wait for a connection, and how many
+    give up after pool_timeout, next to the pool's own counters."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+
+    def wait_stats(self) -> dict:
+        """Checkouts, timeouts and checkout wait times so far."""
+        with self._stats_lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (
+                    self.total_wait / self.checkouts * 1000
+                    if self.checkouts
+                    else 0.0
+                ),
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    """QueuePool of the sync engine."""
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    """QueuePool of the async engine."""
+
+
+def pool_stats(engine: Engine) -> dict:
+    """Occupancy and checkout waits of the connection pool of an engine."""
+    pool: Pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(0, pool.overflow()),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    if isinstance(pool, TimedPoolMixin):
+        stats.update(pool.wait_stats())
+    return stats
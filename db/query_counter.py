@@ -0,0 +1,40 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    """Number of SQL statements executed within a count_queries block."""
+
+    def __init__(self):
+        self.count = 0
+
+
+_current_counter: ContextVar[Optional[QueryCounter]] = ContextVar(
+    "query_counter", default=None
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, many):
+    """Increment the counter active in the current context, if any."""
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.count += 1
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Count the statements executed by every engine inside the block.
+
+    The counter is shared with threads and tasks spawned from the block,
+    so sync dependencies run in the threadpool are included."""
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
@@ -4,13 +4,18 @@ from datetime import date
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.dependencies import get_db
 from app.main import app
+from app.jwt_handler import token_cache
+from app.result_cache import result_cache
 from app.security import hash_password
+from app.user_cache import user_cache
 from db import models
-from db.engine import Base
+from db.engine import Base, get_async_database_url
 
 DATABASE_URL = "sqlite:///./test.db"
 NUM_OF_ITEMS = 10
@@ -18,6 +23,10 @@ NUM_OF_ITEMS = 10
 
 @pytest.fixture(scope="module")
 def test_db():
+    # Ids and emails are reused by the next module's database
+    user_cache.clear()
+    token_cache.clear()
+    result_cache.clear()
     engine = create_engine(DATABASE_URL)
     Base.metadata.create_all(bind=engine)
     TestingSessionLocal = sessionmaker(
@@ -38,6 +47,29 @@ def test_db():
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(scope="module")
+def async_db(test_db):
+    # Each TestClient runs its own event loop, so connections are not pooled.
+    # SQLite serializes writers, give queued ones time to get their turn.
+    engine = create_async_engine(
+        get_async_database_url(DATABASE_URL),
+        poolclass=NullPool,
+        connect_args={"timeout": 60},
+    )
+    AsyncTestingSessionLocal = async_sessionmaker(
+        bind=engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    sync_override = app.dependency_overrides[get_db]
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    app.dependency_overrides[get_db] = sync_override
+
+
 @pytest.fixture()
 def client(test_db):
     with TestClient(app) as c:
@@ -71,6 +103,17 @@ def user(test_db):
     return user
 
 
+def login(client, user, password=None) -> dict:
+    """Authorization headers of a user, by default with the password of
+    the admin_user or user fixture."""
+    if password is None:
+        password = "adminpassword" if user.is_admin else "userpassword"
+    response = client.post(
+        "/login", data={"username": user.email, "password": password}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
 @pytest.fixture()
 def create_publishers(test_db):
     publishers = []
@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from app import cli, crud
+from db import models
+from tests.conftest import login
+
+START = date(2020, 1, 1)
+NUM_OF_LOANS = 8
+
+
+def add_loans(test_db, book_id: int, user_id: int) -> None:
+    # One loan a month, all returned but the last one
+    for i in range(NUM_OF_LOANS):
+        borrowed = START + timedelta(days=30 * i)
+        test_db.add(
+            models.BorrowingHistory(
+                book_id=book_id,
+                user_id=user_id,
+                borrow_date=borrowed,
+                return_date=(
+                    borrowed + timedelta(days=5)
+                    if i < NUM_OF_LOANS - 1
+                    else None
+                ),
+            )
+        )
+    test_db.commit()
+
+
+def test_archive_moves_old_returned_loans(
+    client, test_db, admin_user, create_books, user
+):
+    add_loans(test_db, create_books[0].id, user.id)
+    headers = login(client, admin_user)
+    url = f"/books/{create_books[0].id}/history?limit=100"
+    before = client.get(url, headers=headers).json()
+
+    archived = crud.archive_returned_loans(
+        test_db, START + timedelta(days=100), batch_size=2
+    )
+
+    assert archived == 4
+    assert test_db.query(models.ArchivedBorrowing).count() == 4
+    assert test_db.query(models.BorrowingHistory).count() == NUM_OF_LOANS - 4
+    assert client.get(url, headers=headers).json() == before
+
+    response = client.get(f"{url}&active_only=true", headers=headers)
+    assert [loan["return_date"] for loan in response.json()] == [None]
+
+
+def test_history_pages_across_tiers(client, test_db, admin_user):
+    user = test_db.query(models.ArchivedBorrowing).first().user_id
+    headers = login(client, admin_user)
+    url = f"/users/{user}/history?limit=3&sort_order=asc"
+
+    seen = []
+    response = client.get(url, headers=headers)
+    while True:
+        seen.extend(loan["borrow_date"] for loan in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        response = client.get(f"{url}&cursor={cursor}", headers=headers)
+
+    assert seen == [
+        (START + timedelta(days=30 * i)).isoformat()
+        for i in range(NUM_OF_LOANS)
+    ]
+
+
+def test_archive_keeps_newest_loan(test_db):
+    newest = test_db.query(models.BorrowingHistory).order_by(
+        models.BorrowingHistory.id.desc()
+    )[0]
+    newest.return_date = START
+    test_db.commit()
+
+    crud.archive_returned_loans(test_db, date.today())
+
+    assert test_db.query(models.BorrowingHistory).one().id == newest.id
+
+
+def test_cli_archive_loans(test_db, monkeypatch, capsys):
+    monkeypatch.setattr(
+        cli, "SessionLocal", sessionmaker(bind=test_db.get_bind())
+    )
+
+    assert cli.main(["archive-loans", "--older-than-days", "0"]) == 0
+    assert "Archived 0 loan(s)" in capsys.readouterr().out
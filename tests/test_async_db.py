@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+from app import async_crud, crud
+from tests.conftest import NUM_OF_ITEMS
+from db.engine import get_async_database_url
+
+
+def test_async_database_url():
+    assert (
+        get_async_database_url("sqlite:///./library.db")
+        == "sqlite+aiosqlite:///./library.db"
+    )
+    assert (
+        get_async_database_url("sqlite+aiosqlite:///./library.db")
+        == "sqlite+aiosqlite:///./library.db"
+    )
+
+
+def test_sync_session_runs_on_the_threadpool(test_db):
+    threads = []
+
+    def query(db):
+        threads.append(threading.get_ident())
+        return crud.get_user_by_email(db, "nobody@example.com")
+
+    assert asyncio.run(async_crud.run(test_db, query)) is None
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_get_books_async(client, async_db, create_books):
+    response = client.get("/books?limit=20")
+    assert response.status_code == 200
+    assert len(response.json()) == NUM_OF_ITEMS
+    assert response.json()[0]["author"]["name"] == "Author 0"
+
+
+def test_register_and_login_async(client, async_db):
+    user_data = {"email": "asyncuser@example.com", "password": "password"}
+    response = client.post("/register", json=user_data)
+    assert response.status_code == 200
+
+    response = client.post(
+        "/login",
+        data={"username": user_data["email"], "password": "password"},
+    )
+    assert response.status_code == 200
+    assert "access_token" in response.json()
+
+
+def test_borrow_and_return_async(client, async_db, user):
+    response = client.post(
+        "/login", data={"username": user.email, "password": "userpassword"}
+    )
+    token = response.json().get("access_token")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.post("/books/1/borrow", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["user"]["email"] == user.email
+
+    response = client.post("/books/1/return", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["return_date"] is not None
@@ -1,3 +1,13 @@
+import asyncio
+import threading
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app import jwt_handler, security
+
+
 def test_register_user(client):
     user_data = {"email": "testuser@example.com", "password": "testpassword"}
 
@@ -58,3 +68,71 @@ def test_login_invalid_password(client):
 
     assert response.status_code == 401
     assert response.json()["detail"] == "Incorrect email or password"
+
+
+def test_verified_tokens_are_cached():
+    token = jwt_handler.create_access_token(data={"sub": "a@example.com"})
+    error = HTTPException(status_code=403)
+
+    assert jwt_handler.verify_token(token, error) == "a@example.com"
+    hits = jwt_handler.token_cache.hits
+    assert jwt_handler.verify_token(token, error) == "a@example.com"
+    assert jwt_handler.token_cache.hits == hits + 1
+
+
+def test_token_cache_honours_key_rotation(monkeypatch):
+    token = jwt_handler.create_access_token(data={"sub": "a@example.com"})
+    error = HTTPException(status_code=403)
+    jwt_handler.verify_token(token, error)
+
+    monkeypatch.setattr(jwt_handler, "SECRET_KEY", "rotated-secret")
+    with pytest.raises(HTTPException):
+        jwt_handler.verify_token(token, error)
+
+
+def test_expired_tokens_are_not_cached():
+    token = jwt_handler.create_access_token(
+        data={"sub": "a@example.com"}, expires_delta=timedelta(seconds=-1)
+    )
+    size = jwt_handler.token_cache.stats()["size"]
+
+    with pytest.raises(HTTPException):
+        jwt_handler.verify_token(token, HTTPException(status_code=403))
+    assert jwt_handler.token_cache.stats()["size"] == size
+
+
+def test_hashing_pool_rejects_when_full():
+    pool = security.HashingPool(kind="thread", workers=1, queue_limit=1)
+    release = threading.Event()
+
+    async def run():
+        blocked = [
+            asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)
+        ]
+        await asyncio.sleep(0.05)
+        assert pool.stats()["queue_depth"] == 1
+        with pytest.raises(HTTPException) as rejected:
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*blocked)
+        return rejected.value
+
+    rejected = asyncio.run(run())
+    assert rejected.status_code == 503
+    assert pool.stats()["rejected"] == 1
+    assert pool.stats()["completed"] == 2
+
+
+def test_password_hashing_stats(client, admin_user):
+    response = client.post(
+        "/login",
+        data={"username": admin_user.email, "password": "adminpassword"},
+    )
+    token = response.json()["access_token"]
+
+    response = client.get(
+        "/diagnostics/password-hashing",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert response.json()["completed"] >= 1
@@ -0,0 +1,73 @@
+import asyncio
+import csv
+import io
+import json
+
+import msgpack
+
+from app.book_export import export_books
+from db.query_counter import count_queries
+from tests.conftest import login
+
+NUM_OF_BOOKS = 10
+
+
+def test_export_ndjson(client, user, create_books):
+    response = client.get("/books/export", headers=login(client, user))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "books.ndjson" in response.headers["content-disposition"]
+    assert response.headers["ETag"].startswith('W/"books-')
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [book.id for book in create_books]
+    assert rows[0]["title"] == "Book 0"
+    assert rows[0]["author_name"] == create_books[0].author.name
+    assert rows[0]["publish_date"] == "2000-01-01"
+
+
+def test_export_csv(client, user):
+    response = client.get(
+        "/books/export?format=csv", headers=login(client, user)
+    )
+
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == NUM_OF_BOOKS
+    assert rows[0]["genre_name"] == "Genre 0"
+
+
+def test_export_msgpack(client, user):
+    response = client.get(
+        "/books/export?format=msgpack", headers=login(client, user)
+    )
+
+    assert response.headers["content-type"] == "application/msgpack"
+    rows = list(msgpack.Unpacker(io.BytesIO(response.content)))
+    assert len(rows) == NUM_OF_BOOKS
+    assert rows[0]["title"] == "Book 0"
+    assert rows[0]["publish_date"] == "2000-01-01"
+
+
+def test_export_requires_authentication(client):
+    assert client.get("/books/export").status_code == 401
+
+
+def test_export_streams_in_batches(test_db):
+    async def collect() -> list[bytes]:
+        return [chunk async for chunk in export_books(test_db, "ndjson", 3)]
+
+    with count_queries() as counter:
+        chunks = asyncio.run(collect())
+
+    assert counter.count == 1
+    assert [chunk.count(b"\n") for chunk in chunks] == [3, 3, 3, 1]
+
+
+def test_export_async(client, async_db, user):
+    response = client.get(
+        "/books/export?format=csv", headers=login(client, user)
+    )
+
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == NUM_OF_BOOKS + 1
@@ -0,0 +1,150 @@
+import json
+
+import msgpack
+from sqlalchemy.orm import sessionmaker
+
+from app import cli, crud
+from db import models
+from db.query_counter import count_queries
+from tests.conftest import login
+
+HEADER = "title,isbn,publish_date,author_id,genre_id,publisher_id"
+
+
+def upload(client, headers, name: str, content: str):
+    return client.post(
+        "/books/import",
+        files={"file": (name, content.encode())},
+        headers=headers,
+    )
+
+
+def test_import_csv_reports_failed_rows(
+    client, test_db, admin_user, create_books
+):
+    content = "\n".join(
+        [
+            HEADER + ",number_of_copies",
+            "Imported One,9780306406157,2001-01-01,1,1,1,3",
+            "Bad Isbn,123,2001-01-01,1,1,1,3",
+            "Unknown Author,9780306406157,2001-01-01,999,1,1,3",
+            "Negative Copies,9780306406157,2001-01-01,1,1,1,-1",
+            '"Imported, Two",9780306406157,2001-01-01,2,2,2,',
+            "No Publisher,9780306406157,2001-01-01,1,1,,2",
+        ]
+    )
+    response = upload(client, login(client, admin_user), "books.csv", content)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 2
+    assert report["failed"] == 4
+    errors = {error["row"]: error["detail"] for error in report["errors"]}
+    assert list(errors) == [2, 3, 4, 6]
+    assert errors[3] == "Author not found"
+    assert errors[4] == "Number of copies must be a positive integer"
+    assert errors[6].startswith("publisher_id")
+
+    book = test_db.query(models.Book).filter_by(title="Imported, Two").one()
+    assert book.number_of_copies == book.available_copies == 1
+    titles = [b["title"] for b in client.get("/books/search?q=import").json()]
+    assert sorted(titles) == ["Imported One", "Imported, Two"]
+
+
+def test_import_ndjson(client, admin_user):
+    keys = HEADER.split(",")
+    lines = [
+        json.dumps(dict(zip(keys, ["Json Book", "9780306406157"]))),
+        json.dumps(
+            dict(zip(keys, ["Json Book", "9780306406157", "2001-01-01"]))
+            | {"author_id": 1, "genre_id": 1, "publisher_id": 1}
+        ),
+        "{not json",
+        "",
+        "[1, 2]",
+    ]
+    response = upload(
+        client, login(client, admin_user), "books.ndjson", "\n".join(lines)
+    )
+
+    report = response.json()
+    assert report["imported"] == 1
+    assert [error["row"] for error in report["errors"]] == [1, 3, 4]
+    assert report["errors"][1]["detail"] == "Invalid JSON"
+
+
+def test_import_msgpack(client, admin_user):
+    book = {
+        "title": "Packed Book",
+        "isbn": "9780306406157",
+        "publish_date": "2001-01-01",
+        "author_id": 1,
+        "genre_id": 1,
+        "publisher_id": 1,
+    }
+    content = b"".join([msgpack.packb(book), msgpack.packb([1, 2]), b"\xc1"])
+    response = client.post(
+        "/books/import",
+        files={"file": ("books.msgpack", content)},
+        headers=login(client, admin_user),
+    )
+
+    report = response.json()
+    assert report["imported"] == 1
+    assert [error["detail"] for error in report["errors"]] == [
+        "Expected a MessagePack map",
+        "Invalid MessagePack",
+    ]
+
+
+def test_import_requires_admin(client, user):
+    response = upload(
+        client, login(client, user, "userpassword"), "books.csv", HEADER
+    )
+    assert response.status_code == 403
+
+
+def test_chunk_query_count_is_constant(test_db):
+    counts = []
+    for size in (2, 20):
+        rows = [
+            (
+                row,
+                {
+                    "title": f"Chunk {size} {row}",
+                    "isbn": "9780306406157",
+                    "publish_date": "2001-01-01",
+                    "author_id": row % 5 + 1,
+                    "genre_id": row % 3 + 1,
+                    "publisher_id": 1,
+                },
+            )
+            for row in range(size)
+        ]
+        with count_queries() as counter:
+            imported, errors = crud.import_books_chunk(test_db, rows)
+        assert (imported, errors) == (size, [])
+        counts.append(counter.count)
+
+    assert counts[0] == counts[1]
+
+
+def test_cli_import(test_db, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(
+        cli, "SessionLocal", sessionmaker(bind=test_db.get_bind())
+    )
+    path = tmp_path / "books.csv"
+    path.write_text(
+        "\n".join(
+            [
+                HEADER,
+                "Cli Book,9780306406157,2001-01-01,1,1,1",
+                "Cli Book,9780306406157,2001-01-01,1,1,999",
+            ]
+        )
+    )
+
+    assert cli.main(["import-books", str(path), "--chunk-size", "1"]) == 1
+    output = capsys.readouterr().out
+    assert "Row 2: Publisher not found" in output
+    assert "Imported 1 book(s), 1 failed." in output
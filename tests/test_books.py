@@ -1,3 +1,9 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.main import add_query_count_header, app
+from app.result_cache import result_cache
 from tests.conftest import NUM_OF_ITEMS
 
 
@@ -76,3 +82,51 @@ def test_create_book_as_admin(client, admin_user):
     )
     assert response.status_code == 200
     assert response.json()["title"] == book_data["title"]
+
+
+def test_get_books_query_count_is_constant(test_db, monkeypatch):
+    # Every request runs its queries
+    monkeypatch.setattr(result_cache, "backend", None)
+    client = TestClient(
+        BaseHTTPMiddleware(app, dispatch=add_query_count_header)
+    )
+    counts = []
+    for limit in (2, NUM_OF_ITEMS):
+        response = client.get(f"/books/?limit={limit}")
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+        counts.append(int(response.headers["X-Query-Count"]))
+
+    assert 0 < counts[0] == counts[1]
+
+
+@pytest.mark.parametrize(
+    "sort_by, sort_order",
+    [("title", "asc"), ("author", "desc"), ("publish_date", "asc")],
+)
+def test_get_books_with_cursor(client, sort_by, sort_order):
+    url = f"/books?sort_by={sort_by}&sort_order={sort_order}"
+    expected = [book["id"] for book in client.get(f"{url}&limit=100").json()]
+
+    seen = []
+    response = client.get(f"{url}&limit=3")
+    while True:
+        assert response.status_code == 200
+        seen.extend(book["id"] for book in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        response = client.get(f"{url}&limit=3&cursor={cursor}")
+
+    assert seen == expected
+
+
+def test_get_books_with_invalid_cursor(client):
+    response = client.get("/books?limit=3")
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(f"/books?sort_by=publish_date&cursor={cursor}")
+    assert response.status_code == 400
+
+    response = client.get("/books?cursor=not-a-cursor")
+    assert response.status_code == 400
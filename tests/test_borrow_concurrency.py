@@ -0,0 +1,95 @@
+import asyncio
+from collections import Counter
+
+import httpx
+
+from app.jwt_handler import create_access_token
+from app.main import app
+from db import models
+
+
+def fire_borrows(
+    book_id: int, emails: list[str], action: str = "borrow"
+) -> Counter:
+    """Send one borrow (or return) request per email, all at once."""
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await asyncio.gather(
+                *(
+                    client.post(
+                        f"/books/{book_id}/{action}",
+                        headers={
+                            "Authorization": "Bearer "
+                            + create_access_token(data={"sub": email})
+                        },
+                    )
+                    for email in emails
+                )
+            )
+
+    return Counter(response.status_code for response in asyncio.run(run()))
+
+
+def active_loans(db, **filters) -> int:
+    return (
+        db.query(models.BorrowingHistory)
+        .filter_by(return_date=None, **filters)
+        .count()
+    )
+
+
+def test_concurrent_borrows_never_oversubscribe(
+    test_db, async_db, create_books
+):
+    book = test_db.get(models.Book, 1)
+    book.number_of_copies = book.available_copies = 25
+    users = [
+        models.User(email=f"reader_{i}@example.com", hashed_password="-")
+        for i in range(50)
+    ]
+    test_db.add_all(users)
+    test_db.commit()
+
+    statuses = fire_borrows(1, [user.email for user in users] * 4)
+
+    assert statuses == {200: 25, 400: 175}
+    test_db.expire_all()
+    assert test_db.get(models.Book, 1).available_copies == 0
+    assert active_loans(test_db, book_id=1) == 25
+
+
+def test_concurrent_borrows_respect_user_limit(test_db, async_db):
+    book = test_db.get(models.Book, 2)
+    book.number_of_copies = book.available_copies = 500
+    user = models.User(email="greedy@example.com", hashed_password="-")
+    test_db.add(user)
+    test_db.commit()
+
+    statuses = fire_borrows(2, [user.email] * 100)
+
+    assert statuses == {200: user.max_books, 400: 100 - user.max_books}
+    test_db.expire_all()
+    assert test_db.get(models.Book, 2).available_copies == 500 - 5
+    assert active_loans(test_db, user_id=user.id) == user.max_books
+
+
+def test_concurrent_returns_close_a_loan_once(test_db, async_db):
+    book = test_db.get(models.Book, 3)
+    book.number_of_copies = book.available_copies = 2
+    user = models.User(email="returner@example.com", hashed_password="-")
+    test_db.add(user)
+    test_db.commit()
+    assert fire_borrows(3, [user.email]) == {200: 1}
+
+    statuses = fire_borrows(3, [user.email] * 20, action="return")
+
+    assert statuses == {200: 1, 404: 19}
+    test_db.expire_all()
+    assert test_db.get(models.Book, 3).available_copies == 2
+    user = test_db.get(models.User, user.id)
+    assert (user.active_loans, user.oldest_loan_date) == (0, None)
+    assert active_loans(test_db, user_id=user.id) == 0
@@ -1,59 +1,83 @@
+from datetime import date
+
+from app import crud
+from db import models
+from tests.conftest import login
+
+
 def test_borrow_book(client, user, create_books):
-    response = client.post(
-        "/login", data={"username": user.email, "password": "userpassword"}
-    )
-    token = response.json().get("access_token")
+    headers = login(client, user)
 
-    response = client.post(
-        "/books/1/borrow", headers={"Authorization": f"Bearer {token}"}
-    )
+    response = client.post("/books/1/borrow", headers=headers)
     assert response.status_code == 200
     assert response.json()["book_id"] == 1
 
 
 def test_return_book(client, user):
-    response = client.post(
-        "/login", data={"username": user.email, "password": "userpassword"}
-    )
-    token = response.json().get("access_token")
+    headers = login(client, user)
 
-    client.post(
-        "/books/1/borrow", headers={"Authorization": f"Bearer {token}"}
-    )
+    client.post("/books/1/borrow", headers=headers)
 
-    response = client.post(
-        "/books/1/return", headers={"Authorization": f"Bearer {token}"}
-    )
+    response = client.post("/books/1/return", headers=headers)
     assert response.status_code == 200
     assert response.json()["book_id"] == 1
 
 
 def test_get_borrowing_history_as_admin(client, admin_user):
-    response = client.post(
-        "/login",
-        data={"username": admin_user.email, "password": "adminpassword"},
-    )
-    token = response.json().get("access_token")
+    headers = login(client, admin_user)
 
-    client.post(
-        "/books/1/borrow", headers={"Authorization": f"Bearer {token}"}
-    )
+    client.post("/books/1/borrow", headers=headers)
 
-    response = client.get(
-        "/books/1/history", headers={"Authorization": f"Bearer {token}"}
-    )
+    response = client.get("/books/1/history", headers=headers)
     assert response.status_code == 200
     assert isinstance(response.json(), list)
     assert len(response.json()) > 0
 
 
 def test_get_borrowing_history_as_non_admin(client, user):
-    response = client.post(
-        "/login", data={"username": user.email, "password": "userpassword"}
-    )
-    token = response.json().get("access_token")
+    headers = login(client, user)
 
-    response = client.get(
-        "/books/1/history", headers={"Authorization": f"Bearer {token}"}
-    )
+    response = client.get("/books/1/history", headers=headers)
     assert response.status_code == 403
+
+
+def test_borrow_and_return_update_available_copies(client, user, test_db):
+    headers = login(client, user)
+    before = crud.get_available_books_count(test_db, book_id=3)
+
+    client.post("/books/3/borrow", headers=headers)
+    assert crud.get_available_books_count(test_db, book_id=3) == before - 1
+
+    client.post("/books/3/return", headers=headers)
+    assert crud.get_available_books_count(test_db, book_id=3) == before
+
+
+def test_borrow_without_available_copies(client, user, test_db):
+    book = test_db.get(models.Book, 4)
+    book.available_copies = 0
+    test_db.commit()
+
+    response = client.post("/books/4/borrow", headers=login(client, user))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "No available copies"
+
+
+def test_repair_available_copies(test_db):
+    book = models.Book(
+        title="Drifted Copies",
+        isbn="9780306406157",
+        publish_date=date(2001, 1, 1),
+        number_of_copies=3,
+        available_copies=1,
+        author=models.Author(name="Drift Author"),
+        genre=models.Genre(name="Drift Genre"),
+        publisher=models.Publisher(name="Drift", established_year=2000),
+    )
+    test_db.add(book)
+    test_db.commit()
+
+    assert (book.id, 1, 3) in crud.get_inconsistent_available_copies(test_db)
+
+    assert crud.repair_available_copies(test_db) >= 1
+    assert crud.get_inconsistent_available_copies(test_db) == []
+    assert crud.get_available_books_count(test_db, book_id=book.id) == 3
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from app.routers import genres
+from db import models
+from tests.conftest import login
+
+
+def test_catalog_responses_carry_validators(client, create_books):
+    response = client.get("/books/")
+    assert response.status_code == 200
+    assert response.headers["ETag"].startswith('W/"books-')
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    response = client.get(f"/books/{create_books[0].id}")
+    assert response.status_code == 200
+    assert "ETag" in response.headers
+
+
+def test_matching_etag_skips_the_query(client, monkeypatch):
+    etag = client.get("/genres/").headers["ETag"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("list query executed for a 304")
+
+    monkeypatch.setattr(genres, "get_genre_rows", fail)
+    response = client.get("/genres/", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_writes_change_the_validators(client, admin_user):
+    response = client.get("/genres/")
+    etag = response.headers["ETag"]
+
+    client.post(
+        "/genres/",
+        json={"name": "Conditional"},
+        headers=login(client, admin_user),
+    )
+    response = client.get("/genres/", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert "Conditional" in [genre["name"] for genre in response.json()]
+
+    # Unrelated tables keep their validators
+    publishers_etag = client.get("/publishers/").headers["ETag"]
+    assert publishers_etag == 'W/"publishers-0"'
+
+
+def set_genres_updated_at(test_db, updated_at: datetime) -> None:
+    test_db.query(models.CatalogVersion).filter_by(name="genres").update(
+        {
+            "version": models.CatalogVersion.version + 1,
+            "updated_at": updated_at,
+        }
+    )
+    test_db.commit()
+
+
+def test_if_modified_since_sees_writes_within_the_second(client, test_db):
+    set_genres_updated_at(test_db, datetime(2026, 1, 1, 12, 0, 0))
+    last_modified = client.get("/genres/").headers["Last-Modified"]
+    assert last_modified == "Thu, 01 Jan 2026 12:00:00 GMT"
+    headers = {"If-Modified-Since": last_modified}
+    assert client.get("/genres/", headers=headers).status_code == 304
+
+    # Written later within the second the client's date names
+    set_genres_updated_at(test_db, datetime(2026, 1, 1, 12, 0, 0, 500000))
+    assert client.get("/genres/", headers=headers).status_code == 200
+
+
+def test_validators_only_match_existing_resources(client, test_db):
+    book_id = test_db.query(models.Book.id).first().id
+    etag = client.get(f"/books/{book_id}").headers["ETag"]
+
+    for value in ("*", etag):
+        headers = {"If-None-Match": value}
+        response = client.get(f"/books/{book_id}", headers=headers)
+        assert response.status_code == 304
+        response = client.get("/books/999999", headers=headers)
+        assert response.status_code == 404
+        response = client.get("/authors/999999/books", headers=headers)
+        assert response.status_code == 404
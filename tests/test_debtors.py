@@ -0,0 +1,87 @@
+from datetime import date
+
+from app import crud
+from db import models
+from tests.conftest import login
+
+
+def debtors(client, headers, **params) -> list[dict]:
+    response = client.get("/debtors", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_debtors_are_listed_once(client, test_db, admin_user, create_books):
+    reader = models.User(email="reader@example.com", hashed_password="-")
+    casual = models.User(email="casual@example.com", hashed_password="-")
+    test_db.add_all([reader, casual])
+    test_db.commit()
+    for book in create_books[:3]:
+        crud.borrow_book(test_db, reader.id, book.id)
+    crud.borrow_book(test_db, casual.id, create_books[0].id)
+
+    listed = debtors(
+        client,
+        login(client, admin_user),
+        sort_by="active_loans",
+        sort_order="desc",
+    )
+
+    assert [(d["email"], d["active_loans"]) for d in listed] == [
+        ("reader@example.com", 3),
+        ("casual@example.com", 1),
+    ]
+    assert listed[0]["oldest_loan_date"] == date.today().isoformat()
+
+
+def test_returns_update_the_summary(client, test_db, admin_user):
+    reader = test_db.query(models.User).filter_by(email="reader@example.com")
+    reader = reader.one()
+    loans = sorted(reader.borrowings, key=lambda loan: loan.book_id)
+    loans[0].borrow_date = date(2020, 1, 1)
+    loans[1].borrow_date = date(2021, 1, 1)
+    test_db.commit()
+
+    crud.return_book(test_db, reader.id, loans[0].book_id)
+    test_db.refresh(reader)
+    assert reader.active_loans == 2
+    assert reader.oldest_loan_date == date(2021, 1, 1)
+
+    for loan in loans[1:]:
+        crud.return_book(test_db, reader.id, loan.book_id)
+    test_db.refresh(reader)
+    assert (reader.active_loans, reader.oldest_loan_date) == (0, None)
+
+    listed = debtors(client, login(client, admin_user))
+    assert [d["email"] for d in listed] == ["casual@example.com"]
+
+
+def test_repeated_return_keeps_the_summary(client, test_db, admin_user, user):
+    crud.borrow_book(test_db, user.id, 4)
+    headers = login(client, user)
+
+    assert client.post("/books/4/return", headers=headers).status_code == 200
+    assert client.post("/books/4/return", headers=headers).status_code == 404
+
+    test_db.refresh(user)
+    assert (user.active_loans, user.oldest_loan_date) == (0, None)
+    listed = debtors(client, login(client, admin_user))
+    assert user.email not in [d["email"] for d in listed]
+
+
+def test_drifted_counter_never_goes_negative(test_db, user):
+    crud.borrow_book(test_db, user.id, 5)
+    user.active_loans = 0
+    test_db.commit()
+
+    crud.return_book(test_db, user.id, 5)
+
+    test_db.refresh(user)
+    assert user.active_loans == 0
+
+
+def test_debtor_sort_options_are_validated(client, admin_user):
+    headers = login(client, admin_user)
+    for params in ({"sort_order": "sideways"}, {"sort_by": "password"}):
+        response = client.get("/debtors", params=params, headers=headers)
+        assert response.status_code == 422
@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import create_engine, exc
+
+from db.engine import engine_options, use_sqlite_pragmas
+from db.pool import TimedQueuePool, pool_stats
+from tests.conftest import login
+
+
+def test_engine_options_depend_on_the_backend(monkeypatch):
+    sqlite = engine_options("sqlite:///./library.db")
+    assert sqlite["connect_args"] == {"check_same_thread": False}
+    assert sqlite["pool_recycle"] == -1
+    assert not sqlite["pool_pre_ping"]
+
+    postgres = engine_options("postgresql://localhost/library")
+    assert "connect_args" not in postgres
+    assert postgres["pool_pre_ping"]
+
+    assert "poolclass" not in engine_options("sqlite://")
+
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "true")
+    sqlite = engine_options("sqlite:///./library.db")
+    assert (sqlite["pool_size"], sqlite["pool_pre_ping"]) == (20, True)
+
+
+def test_pool_stats_count_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    with engine.connect():
+        stats = pool_stats(engine)
+        assert (stats["checked_out"], stats["overflow"]) == (1, 0)
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    stats = pool_stats(engine)
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["max_wait_ms"] >= 10
+
+
+def test_sqlite_pragmas_are_set_on_connect(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    use_sqlite_pragmas(engine)
+
+    with engine.connect() as connection:
+        pragma = connection.exec_driver_sql
+        assert pragma("PRAGMA journal_mode").scalar() == "wal"
+        assert pragma("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert pragma("PRAGMA temp_store").scalar() == 2  # MEMORY
+        assert pragma("PRAGMA busy_timeout").scalar() == 5000
+
+
+def test_pool_diagnostics_require_admin(client, user, admin_user):
+    url = "/diagnostics/database-pool"
+    response = client.get(url, headers=login(client, user, "userpassword"))
+    assert response.status_code == 403
+
+    response = client.get(url, headers=login(client, admin_user))
+    assert response.status_code == 200
+    assert response.json()["sync"]["pool"] == "TimedQueuePool"
@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+
+import pytest
+
+from db import models
+from tests.conftest import login
+
+START = date(2020, 1, 1)
+NUM_OF_LOANS = 12
+
+
+def loan_owner(test_db) -> models.User:
+    return test_db.query(models.BorrowingHistory).first().user
+
+
+@pytest.fixture()
+def loans(test_db, create_books, user):
+    # One loan every 10 days, the last two still active
+    loans = []
+    for i in range(NUM_OF_LOANS):
+        borrowed = START + timedelta(days=10 * i)
+        loan = models.BorrowingHistory(
+            book_id=create_books[0].id,
+            user_id=user.id,
+            borrow_date=borrowed,
+            return_date=(
+                borrowed + timedelta(days=5) if i < NUM_OF_LOANS - 2 else None
+            ),
+        )
+        test_db.add(loan)
+        loans.append(loan)
+    test_db.commit()
+    return loans
+
+
+def test_history_is_paged_newest_first(client, admin_user, loans):
+    headers = login(client, admin_user, "adminpassword")
+    url = f"/books/{loans[0].book_id}/history?limit=5"
+
+    seen = []
+    response = client.get(url, headers=headers)
+    while True:
+        assert response.status_code == 200
+        seen.extend(loan["borrow_date"] for loan in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        response = client.get(f"{url}&cursor={cursor}", headers=headers)
+
+    expected = [loan.borrow_date.isoformat() for loan in reversed(loans)]
+    assert seen == expected
+
+
+def test_history_date_filters(client, test_db, admin_user):
+    headers = login(client, admin_user, "adminpassword")
+    user = loan_owner(test_db)
+
+    response = client.get(
+        f"/users/{user.id}/history?from=2020-01-11&to=2020-01-31"
+        "&sort_order=asc",
+        headers=headers,
+    )
+
+    dates = [loan["borrow_date"] for loan in response.json()]
+    assert dates == ["2020-01-11", "2020-01-21", "2020-01-31"]
+
+
+def test_history_active_only(client, admin_user):
+    headers = login(client, admin_user, "adminpassword")
+
+    response = client.get("/books/1/history?active_only=true", headers=headers)
+
+    assert len(response.json()) == 2
+    assert all(loan["return_date"] is None for loan in response.json())
+
+
+def test_own_history(client, test_db):
+    user = loan_owner(test_db)
+    headers = login(client, user, "userpassword")
+
+    response = client.get("/me/history?limit=3", headers=headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert "X-Next-Cursor" in response.headers
+    assert response.json()[0]["user"]["email"] == user.email
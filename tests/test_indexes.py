@@ -0,0 +1,158 @@
+from contextlib import contextmanager
+from datetime import date
+
+from sqlalchemy import event
+
+from app import crud
+
+
+@contextmanager
+def captured_queries(db):
+    """Collect the statements reading tables the session runs inside
+    the block, including INSERT ... SELECT and UPDATE ... WHERE."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, many):
+        if "SELECT" in statement or "WHERE" in statement:
+            statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def query_plan(db, statement, parameters) -> list[str]:
+    """Return the EXPLAIN QUERY PLAN details of a statement."""
+    connection = db.connection().connection.driver_connection
+    rows = connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return [row[3] for row in rows]
+
+
+def assert_uses_indexes(db, name, statements, table):
+    """Fail if any statement reads table with a full scan."""
+    assert statements, name
+    for statement, parameters in statements:
+        for detail in query_plan(db, statement, parameters):
+            assert detail != f"SCAN {table}", (name, detail, statement)
+
+
+def test_borrowing_queries_use_indexes(test_db, create_books, user):
+    calls = {
+        "get_available_books_count": lambda: crud.get_available_books_count(
+            test_db, book_id=1
+        ),
+        "borrow_book": lambda: crud.borrow_book(
+            test_db, user_id=user.id, book_id=2
+        ),
+        "return_book": lambda: crud.return_book(
+            test_db, user_id=user.id, book_id=2
+        ),
+        "get_active_borrowing_book": lambda: crud.get_active_borrowing_book(
+            test_db, user_id=user.id
+        ),
+        "get_debtor_rows": lambda: crud.get_debtor_rows(test_db),
+    }
+    for name, call in calls.items():
+        with captured_queries(test_db) as statements:
+            call()
+        assert_uses_indexes(test_db, name, statements, "borrowing_history")
+
+
+def test_debtor_pages_use_indexes(test_db):
+    for sort_by in (None, *crud.DEBTOR_SORT_KEYS):
+        with captured_queries(test_db) as statements:
+            crud.get_debtor_rows(test_db, sort_by=sort_by)
+        assert_uses_indexes(test_db, sort_by, statements, "users")
+        statement, parameters = statements[0]
+        plan = query_plan(test_db, statement, parameters)
+        assert not any("TEMP B-TREE" in detail for detail in plan), plan
+
+
+def test_overdue_queries_use_indexes(test_db):
+    calls = {
+        "get_overdue_loans": lambda: crud.get_overdue_loans(test_db),
+        "sweep_overdue_loans": lambda: crud.sweep_overdue_loans(test_db),
+    }
+    for name, call in calls.items():
+        with captured_queries(test_db) as statements:
+            call()
+        assert_uses_indexes(test_db, name, statements, "borrowing_history")
+        statement, parameters = statements[0]
+        plan = query_plan(test_db, statement, parameters)
+        assert not any("TEMP B-TREE" in detail for detail in plan), plan
+
+
+def test_book_foreign_key_queries_use_indexes(test_db):
+    calls = {
+        # Unwrapped, a cached page would not query at all
+        "get_author_book_rows": lambda: crud.get_author_book_rows.__wrapped__(
+            test_db, 1
+        ),
+        "get_genre_book_rows": lambda: crud.get_genre_book_rows.__wrapped__(
+            test_db, 1
+        ),
+    }
+    for name, call in calls.items():
+        with captured_queries(test_db) as statements:
+            call()
+        assert_uses_indexes(test_db, name, statements, "books")
+
+
+def test_history_queries_use_indexes(test_db, user):
+    calls = {
+        "get_borrowing_history": lambda: crud.get_borrowing_history(
+            test_db, book_id=1, date_from=date(2020, 1, 1)
+        ),
+        "get_user_borrowing_history": lambda: crud.get_user_borrowing_history(
+            test_db, user_id=user.id, date_to=date(2030, 1, 1)
+        ),
+    }
+    for name, call in calls.items():
+        with captured_queries(test_db) as statements:
+            call()
+        assert_uses_indexes(test_db, name, statements, "borrowing_history")
+        assert_uses_indexes(
+            test_db, name, statements, "borrowing_history_archive"
+        )
+        # The indexes also delivers the rows in page order
+        statement, parameters = statements[0]
+        plan = query_plan(test_db, statement, parameters)
+        assert not any("TEMP B-TREE" in detail for detail in plan), plan
+
+
+def test_catalog_pages_are_read_in_index_order(test_db):
+    lists = {
+        "books": (crud.get_book_rows, crud.BOOK_ROW_SORT_KEYS),
+        "authors": (crud.get_author_rows, crud.AUTHOR_SORT_KEYS),
+        "publishers": (crud.get_publisher_rows, crud.PUBLISHER_SORT_KEYS),
+    }
+    for table, (list_function, sort_keys) in lists.items():
+        for sort_by in sort_keys:
+            for sort_order in ("asc", "desc"):
+                first = list_function(
+                    test_db, limit=2, sort_by=sort_by, sort_order=sort_order
+                )
+                with captured_queries(test_db) as statements:
+                    list_function(
+                        test_db,
+                        limit=2,
+                        sort_by=sort_by,
+                        sort_order=sort_order,
+                        cursor=first.next_cursor,
+                    )
+                # The page itself, after the catalog versions
+                statement, parameters = next(
+                    (statement, parameters)
+                    for statement, parameters in statements
+                    if f"FROM {table}" in statement
+                )
+                plan = query_plan(test_db, statement, parameters)
+                name = (table, sort_by, sort_order)
+                assert f"SCAN {table}" not in plan, (name, plan)
+                assert not any("TEMP B-TREE" in detail for detail in plan), (
+                    name,
+                    plan,
+                )
@@ -0,0 +1,85 @@
+import msgpack
+import pytest
+
+from app.negotiation import JSON, MSGPACK, negotiate
+from tests.conftest import login
+
+ACCEPT_MSGPACK = {"Accept": MSGPACK}
+
+
+@pytest.mark.parametrize(
+    "accept, media_type",
+    [
+        (None, JSON),
+        ("*/*", JSON),
+        ("application/json", JSON),
+        ("application/msgpack", MSGPACK),
+        ("application/x-msgpack", MSGPACK),
+        ("application/msgpack, */*", MSGPACK),
+        ("application/json, application/msgpack", JSON),
+        ("application/json;q=0.5, application/vnd.msgpack", MSGPACK),
+        ("application/msgpack;q=0, */*", JSON),
+        ("application/msgpack;q=oops", JSON),
+        ("text/html", JSON),
+    ],
+)
+def test_negotiate(accept, media_type):
+    assert negotiate(accept) == media_type
+
+
+def test_list_in_msgpack(client, create_books):
+    json_response = client.get("/books/?limit=3")
+    response = client.get("/books/?limit=3", headers=ACCEPT_MSGPACK)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK
+    assert response.headers["vary"] == "Accept"
+    assert response.headers["etag"] == json_response.headers["etag"]
+    assert "x-next-cursor" in response.headers
+    assert msgpack.unpackb(response.content) == json_response.json()
+    assert json_response.headers["content-type"] == JSON
+
+
+def test_response_model_in_msgpack(client):
+    response = client.get("/books/1", headers=ACCEPT_MSGPACK)
+
+    assert response.headers["content-type"] == MSGPACK
+    assert msgpack.unpackb(response.content) == client.get("/books/1").json()
+
+
+def test_errors_stay_json(client):
+    response = client.get("/books/9999", headers=ACCEPT_MSGPACK)
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Book not found"}
+
+
+def test_msgpack_request_body(client, admin_user):
+    response = client.post(
+        "/authors/",
+        content=msgpack.packb({"name": "Packed", "birthdate": "1970-01-01"}),
+        headers=login(client, admin_user)
+        | {"Content-Type": MSGPACK}
+        | ACCEPT_MSGPACK,
+    )
+
+    assert response.status_code == 200
+    author = msgpack.unpackb(response.content)
+    assert author["name"] == "Packed"
+    assert author["birthdate"] == "1970-01-01"
+
+
+def test_invalid_msgpack_request_body(client, admin_user):
+    response = client.post(
+        "/authors/",
+        content=b"\xc1",
+        headers=login(client, admin_user) | {"Content-Type": MSGPACK},
+    )
+    assert response.status_code == 400
+
+    response = client.post(
+        "/authors/",
+        content=msgpack.packb({"name": "No Birthdate"}),
+        headers=login(client, admin_user) | {"Content-Type": MSGPACK},
+    )
+    assert response.status_code == 422
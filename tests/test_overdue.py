@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from app import cli, crud
+from db import models
+from db.query_counter import count_queries
+from tests.conftest import login
+
+TODAY = date(2024, 3, 1)
+NUM_OF_LOANS = 7
+
+
+def test_borrow_sets_due_date(client, user, create_books):
+    response = client.post("/books/1/borrow", headers=login(client, user))
+
+    due_date = date.today() + timedelta(days=crud.LOAN_PERIOD_DAYS)
+    assert response.json()["due_date"] == due_date.isoformat()
+
+
+def test_sweep_records_overdue_loans(test_db, user, monkeypatch):
+    monkeypatch.setattr(crud, "OVERDUE_FINE_PER_DAY", 5)
+    # Due from 3 days before TODAY to 3 days after, the first one returned
+    for i in range(NUM_OF_LOANS):
+        due_date = TODAY + timedelta(days=i - 3)
+        test_db.add(
+            models.BorrowingHistory(
+                book_id=2,
+                user_id=user.id,
+                borrow_date=due_date - timedelta(days=14),
+                due_date=due_date,
+                return_date=TODAY if i == 0 else None,
+            )
+        )
+    test_db.commit()
+
+    with count_queries() as counter:
+        swept = crud.sweep_overdue_loans(test_db, TODAY, batch_size=1)
+
+    assert swept == 2
+    # Two batches of three statements, and the empty last batch
+    assert counter.count == 7
+    fines = test_db.query(
+        models.OverdueLoan.days_overdue, models.OverdueLoan.fine
+    )
+    assert sorted(fines) == [(1, 5), (2, 10)]
+
+    crud.sweep_overdue_loans(test_db, TODAY + timedelta(days=2))
+    fines = test_db.query(
+        models.OverdueLoan.days_overdue, models.OverdueLoan.fine
+    )
+    assert sorted(fines) == [(1, 5), (2, 10), (3, 15), (4, 20)]
+
+
+def test_overdue_endpoint(client, test_db, admin_user):
+    response = client.get("/overdue", headers=login(client, admin_user))
+
+    assert response.status_code == 200
+    assert [loan["due_date"] for loan in response.json()] == [
+        (TODAY + timedelta(days=i)).isoformat() for i in range(-2, 4)
+    ]
+
+
+def test_cli_sweep_overdue(test_db, monkeypatch, capsys):
+    monkeypatch.setattr(
+        cli, "SessionLocal", sessionmaker(bind=test_db.get_bind())
+    )
+
+    assert cli.main(["sweep-overdue"]) == 0
+    assert "6 loan(s) overdue." in capsys.readouterr().out
@@ -0,0 +1,64 @@
+import pytest
+
+from app import crud, schemas
+from app.responses import ListSerializer
+from db import models
+from db.query_counter import count_queries
+
+LISTS = [
+    (crud.get_book_rows, models.Book, schemas.Book, ()),
+    (crud.get_author_rows, models.Author, schemas.Author, ()),
+    (crud.get_author_book_rows, models.Book, schemas.Book, (1,)),
+    (crud.get_genre_rows, models.Genre, schemas.Genre, ()),
+    (crud.get_genre_book_rows, models.Book, schemas.Book, (1,)),
+    (crud.get_publisher_rows, models.Publisher, schemas.Publisher, ()),
+    (crud.get_user_rows, models.User, schemas.User, ()),
+]
+
+
+def test_list_serializer_writes_json(client, create_books, user):
+    response = client.get("/books/?limit=3&sort_by=author")
+
+    assert response.headers["content-type"] == "application/json"
+    assert "X-Next-Cursor" in response.headers
+    assert response.headers["ETag"].startswith('W/"books-')
+    book = response.json()[0]
+    assert set(book) == set(schemas.Book.model_fields)
+    assert set(book["author"]) == {"id", "name", "birthdate"}
+
+
+@pytest.mark.parametrize("row_list, model, schema, args", LISTS)
+def test_rows_match_orm_instances(test_db, row_list, model, schema, args):
+    for sort_by in (None, "title", "author", "name"):
+        rows = row_list(test_db, *args, limit=4, sort_by=sort_by)
+
+        assert rows
+        for row in rows:
+            # Cached lists return response models, the others dicts
+            item = schema.model_validate(row, from_attributes=True)
+            assert item == schema.model_validate(
+                test_db.get(model, item.id), from_attributes=True
+            )
+
+
+def test_book_rows_skip_the_orm(test_db):
+    test_db.expunge_all()
+    with count_queries() as counter:
+        rows = crud.get_book_rows(test_db, limit=7, sort_by="author")
+
+    # The result cache reads the catalog versions, then the page is one query
+    assert counter.count == 2
+    assert len(rows) == 7
+    assert len(test_db.identity_map) == 0
+
+
+def test_list_serializer_accepts_models_and_dicts():
+    serializer = ListSerializer(schemas.Genre)
+    models = [schemas.Genre(id=1, name="A")]
+    dicts = [{"id": 1, "name": "A"}]
+
+    assert serializer.adapter.dump_json(
+        serializer.adapter.validate_python(models)
+    ) == serializer.adapter.dump_json(
+        serializer.adapter.validate_python(dicts)
+    )
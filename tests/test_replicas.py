@@ -0,0 +1,109 @@
+import shutil
+from time import time
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.dependencies import get_db
+from app.main import app
+from app.session_router import (
+    LAST_WRITE_COOKIE,
+    SessionRouter,
+    pin_writers_to_primary,
+)
+from db import models
+from db.engine import make_engine
+from tests.conftest import login
+
+
+@pytest.fixture()
+def router(test_db, user, admin_user, tmp_path):
+    # The replica is a copy of the primary taken before the test writes
+    replica_path = tmp_path / "replica.db"
+    shutil.copy("test.db", replica_path)
+    replica = make_engine(f"sqlite:///{replica_path}", read_only=True)
+    router = SessionRouter(
+        sessionmaker(bind=test_db.get_bind()), [sessionmaker(bind=replica)]
+    )
+
+    def override_get_db(request: Request):
+        db = router.session_factory(request)()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    primary_override = app.dependency_overrides[get_db]
+    app.dependency_overrides[get_db] = override_get_db
+    yield router
+    app.dependency_overrides[get_db] = primary_override
+    replica.dispose()
+
+
+def test_reads_use_the_replica_until_the_user_writes(
+    create_books, client, router, user, admin_user
+):
+    headers = login(client, user, "userpassword")
+    admin_headers = login(client, admin_user, "adminpassword")
+
+    assert client.post("/books/1/borrow", headers=headers).status_code == 200
+
+    # The borrower reads their own write from the primary
+    assert len(client.get("/me/history", headers=headers).json()) == 1
+    # Everyone else still reads the stale replica
+    history = client.get("/books/1/history", headers=admin_headers)
+    assert history.json() == []
+
+    router.recent_writers.clear()
+    assert client.get("/me/history", headers=headers).json() == []
+
+
+def test_last_write_cookie_pins_reads_on_every_worker(router, user):
+    client = TestClient(
+        BaseHTTPMiddleware(app, dispatch=pin_writers_to_primary)
+    )
+    headers = login(client, user)
+    assert client.post("/books/2/borrow", headers=headers).status_code == 200
+
+    # A worker that did not take the write only has the cookie to go by
+    router.recent_writers.clear()
+    assert len(client.get("/me/history", headers=headers).json()) == 1
+
+    client.cookies.clear()
+    assert client.get("/me/history", headers=headers).json() == []
+
+
+def test_unauthenticated_writes_are_pinned(router):
+    client = TestClient(
+        BaseHTTPMiddleware(app, dispatch=pin_writers_to_primary)
+    )
+    response = client.post(
+        "/register",
+        json={"email": "pinned@example.com", "password": "pinnedpassword"},
+    )
+    assert response.status_code == 200
+    written = float(response.cookies[LAST_WRITE_COOKIE])
+
+    def read(cookie: str) -> Request:
+        return Request(
+            {
+                "type": "http",
+                "method": "GET",
+                "headers": [(b"cookie", f"last_write={cookie}".encode())],
+            }
+        )
+
+    assert router.session_factory(read(str(written))) is router.primary
+    stale = str(time() - router.sticky_seconds)
+    assert router.session_factory(read(stale)) is not router.primary
+
+
+def test_replicas_are_read_only(router):
+    with router.replicas[0]() as replica:
+        with pytest.raises(OperationalError, match="readonly"):
+            replica.execute(insert(models.Genre).values(name="Diverged"))
@@ -0,0 +1,51 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from pydantic_extra_types.isbn import ISBN
+
+from app import schemas
+from app.main import app
+from app.responses import NegotiatedResponse, ORJSONResponse
+
+
+def test_orjson_response_encodes_dates_and_isbns():
+    genre = schemas.Genre(id=1, name="Poetry")
+    body = ORJSONResponse(
+        {
+            "published": date(2001, 1, 1),
+            "at": datetime(2001, 1, 1, 12, 30),
+            "isbn": ISBN("9780306406157"),
+            "genre": genre,
+            "fine": Decimal("1.50"),
+            1: "non-string key",
+        }
+    ).body
+
+    assert json.loads(body) == {
+        "published": "2001-01-01",
+        "at": "2001-01-01T12:30:00",
+        "isbn": "9780306406157",
+        "genre": {"id": 1, "name": "Poetry"},
+        "fine": "1.50",
+        "1": "non-string key",
+    }
+
+
+def test_orjson_response_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        ORJSONResponse({"value": object()})
+
+
+def test_routes_respond_with_orjson(client, create_books):
+    route = next(
+        route
+        for route in app.routes
+        if getattr(route, "path", None) == "/books/{book_id}"
+    )
+    assert route.response_class is NegotiatedResponse
+
+    response = client.get("/books/1")
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["isbn"] == create_books[0].isbn
@@ -0,0 +1,124 @@
+from datetime import date
+
+from app import crud, schemas
+from app.cache import TTLCache
+from app.result_cache import result_cache
+from db import models
+from db.query_counter import count_queries
+from tests.conftest import login
+
+
+def test_cache_is_bounded_by_size_in_bytes():
+    cache = TTLCache(maxsize=100, ttl=60, maxbytes=10, sizeof=len)
+    cache.set("a", b"12345")
+    cache.set("b", b"12345")
+    cache.set("c", b"123")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == b"12345"
+    assert cache.stats()["bytes"] == 8
+
+    cache.set("d", b"12345678901")
+    assert cache.get("d") is None
+    assert cache.stats()["bytes"] == 8
+
+
+def test_repeated_reads_skip_the_database(test_db, create_books):
+    first = crud.get_book_rows(test_db, limit=5)
+    with count_queries() as counter:
+        second = crud.get_book_rows(test_db, limit=5)
+
+    # Only the catalog versions are read
+    assert counter.count == 1
+    assert second == first
+    assert isinstance(second[0], schemas.Book)
+    assert second.next_cursor == first.next_cursor
+
+
+def new_book(book: models.Book, title: str) -> schemas.BookCreate:
+    return schemas.BookCreate(
+        title=title,
+        isbn=book.isbn,
+        publish_date=date(2001, 1, 1),
+        author_id=book.author_id,
+        genre_id=book.genre_id,
+        publisher_id=book.publisher_id,
+    )
+
+
+def test_new_book_invalidates_only_affected_lists(test_db):
+    books = test_db.query(models.Book).order_by(models.Book.id).all()
+    author_id = books[0].author_id
+    other_author_id = books[1].author_id
+    crud.get_book_rows(test_db)
+    crud.get_author_book_rows(test_db, author_id=author_id)
+    crud.get_author_book_rows(test_db, author_id=other_author_id)
+
+    crud.create_book(test_db, new_book(books[0], "Cached Book"))
+
+    with count_queries() as counter:
+        crud.get_author_book_rows(test_db, author_id=other_author_id)
+    assert counter.count == 1
+
+    titles = [
+        book.title
+        for book in crud.get_author_book_rows(test_db, author_id=author_id)
+    ]
+    assert "Cached Book" in titles
+    assert crud.get_book_rows(test_db, sort_by="title")[0].title == "Book 0"
+
+
+def test_write_from_another_worker_invalidates(client, test_db, monkeypatch):
+    books = test_db.query(models.Book).order_by(models.Book.id).all()
+    author_id = books[0].author_id
+    other_author_id = books[1].author_id
+    first = client.get("/genres/")
+    assert client.get("/genres/").json() == first.json()
+    crud.get_author_book_rows(test_db, author_id=author_id)
+    crud.get_author_book_rows(test_db, author_id=other_author_id)
+
+    # Another worker's commits only reach this process through the
+    # versions in the database
+    with monkeypatch.context() as patch:
+        patch.setattr(result_cache, "invalidate", lambda *tags: None)
+        crud.create_genre(test_db, schemas.GenreCreate(name="Aaa Other"))
+        crud.create_book(test_db, new_book(books[0], "Other Worker Book"))
+    response = client.get("/genres/?sort_by=name")
+
+    assert response.headers["ETag"] != first.headers["ETag"]
+    assert response.json()[0]["name"] == "Aaa Other"
+    with count_queries() as counter:
+        crud.get_author_book_rows(test_db, author_id=other_author_id)
+    assert counter.count == 1
+    titles = [
+        book.title
+        for book in crud.get_author_book_rows(test_db, author_id=author_id)
+    ]
+    assert "Other Worker Book" in titles
+
+
+def test_created_author_is_listed(client, admin_user):
+    headers = login(client, admin_user)
+    names = [author["name"] for author in client.get("/authors/").json()]
+
+    response = client.post(
+        "/authors/",
+        json={"name": "Aaron Cached", "birthdate": "1970-01-01"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    response = client.get("/authors/?sort_by=name")
+
+    assert "Aaron Cached" not in names
+    assert response.json()[0]["name"] == "Aaron Cached"
+
+
+def test_result_cache_stats_endpoint(client, admin_user):
+    response = client.get(
+        "/diagnostics/caches", headers=login(client, admin_user)
+    )
+    stats = response.json()["results"]
+
+    assert stats["hits"] == result_cache.stats()["hits"] > 0
+    assert 0 < stats["hit_ratio"] < 1
+    assert stats["invalidations"] > 0
@@ -0,0 +1,96 @@
+from datetime import date
+
+import pytest
+
+from app import crud
+from app.result_cache import result_cache
+from db import models
+
+
+def add_book(test_db, title: str, author: models.Author) -> models.Book:
+    book = models.Book(
+        title=title,
+        isbn="9780306406157",
+        publish_date=date(2001, 1, 1),
+        author_id=author.id,
+        genre_id=1,
+        publisher_id=1,
+    )
+    test_db.add(book)
+    test_db.commit()
+    return book
+
+
+def search(client, q: str, **params) -> list[str]:
+    response = client.get("/books/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return [book["title"] for book in response.json()]
+
+
+def test_search_matches_word_prefixes(client, test_db, create_books):
+    author = test_db.get(models.Author, create_books[0].author_id)
+    add_book(test_db, "The Wandering Earth", author)
+    add_book(test_db, "Wanderers", author)
+
+    assert search(client, "wander") == ["Wanderers", "The Wandering Earth"]
+    assert search(client, "wand eart") == ["The Wandering Earth"]
+    assert search(client, "wonder") == []
+
+
+def test_search_ranks_titles_above_authors(client, test_db):
+    author = models.Author(name="Ursula Orbit", birthdate=date(1929, 10, 21))
+    test_db.add(author)
+    test_db.commit()
+    add_book(test_db, "Dispossessed", author)
+    add_book(test_db, "Orbit of Saturn", test_db.get(models.Author, 2))
+
+    assert search(client, "orbit") == ["Orbit of Saturn", "Dispossessed"]
+
+
+def test_search_follows_author_renames(client, test_db):
+    author = test_db.query(models.Author).filter_by(name="Ursula Orbit").one()
+    author.name = "Ursula Le Guin"
+    test_db.commit()
+
+    assert search(client, "guin") == ["Dispossessed"]
+
+
+@pytest.fixture(scope="module")
+def paged_books(test_db) -> list[models.Book]:
+    author = models.Author(name="Paula Pager", birthdate=date(1950, 1, 1))
+    genre = models.Genre(name="Paged Genre")
+    publisher = models.Publisher(name="Paged Press", established_year=1950)
+    books = [
+        models.Book(
+            title=f"Paged {i}",
+            isbn="9780306406157",
+            publish_date=date(2001, 1, 1),
+            author=author,
+            genre=genre,
+            publisher=publisher,
+        )
+        for i in range(10)
+    ]
+    test_db.add_all(books)
+    test_db.commit()
+    return books
+
+
+@pytest.mark.parametrize("window", [0, 4])
+def test_search_walks_every_page(client, monkeypatch, paged_books, window):
+    monkeypatch.setattr(crud, "SEARCH_RANK_WINDOW", window)
+    # The window is part of the configuration, not of the cache key
+    result_cache.clear()
+    matches = search(client, "paged", limit=100)
+    pages = []
+    for offset in range(0, len(paged_books) + 3, 3):
+        pages += search(client, "paged", offset=offset, limit=3)
+
+    assert pages == matches
+    assert len(set(pages)) == len(pages)
+    assert len(matches) == (window or len(paged_books))
+
+
+def test_search_ignores_query_syntax(client):
+    assert search(client, '" OR NEAR(*') == []
+    assert search(client, "wandering*") == ["The Wandering Earth"]
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+def test_lifespan_creates_tables(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        main.Base.metadata, "create_all", lambda bind: calls.append(bind)
+    )
+
+    with TestClient(main.app):
+        assert calls == [main.engine]
+
+    monkeypatch.setattr(main, "CREATE_TABLES_ON_STARTUP", False)
+    with TestClient(main.app):
+        assert calls == [main.engine]
+
+
+def test_import_defers_jose_jwt_and_passlib():
+    code = (
+        "import sys, app.main; "
+        "print(sorted({'jose.jwt', 'passlib', 'cryptography'} "
+        "& set(sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", code],
+        env=os.environ,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,55 @@
+import time
+
+from app.cache import TTLCache
+from app.user_cache import user_cache
+from db import models
+from tests.conftest import login
+
+
+def test_cache_evicts_least_recently_used_and_expired_entries():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+    cache.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("d") is None
+
+
+def test_authenticated_requests_hit_the_cache(client, user):
+    headers = login(client, user)
+
+    client.get("/me/debts", headers=headers)
+    misses = user_cache.misses
+    hits = user_cache.hits
+    client.get("/me/debts", headers=headers)
+
+    assert user_cache.misses == misses
+    assert user_cache.hits == hits + 1
+
+
+def test_user_changes_invalidate_the_cache(client, test_db, user):
+    headers = login(client, user)
+    response = client.get("/users", headers=headers)
+    assert response.status_code == 403
+
+    db_user = test_db.get(models.User, user.id)
+    db_user.is_admin = True
+    test_db.commit()
+
+    response = client.get("/users", headers=headers)
+    assert response.status_code == 200
+
+
+def test_cache_stats_endpoint(client, admin_user):
+    headers = login(client, admin_user, password="adminpassword")
+
+    response = client.get("/diagnostics/caches", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["users"]["hits"] >= 0